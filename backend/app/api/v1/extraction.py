@@ -112,7 +112,7 @@ async def extract_project_data(
             extracted_data = await extraction_service.extract_file(file_obj)
             
             # Daten ins JSON-Modell integrieren
-            current_data.data_json = extraction_service.merge_extracted_data(
+            current_data.data_json, _ = extraction_service.merge_extracted_data(
                 current_data.data_json,
                 extracted_data,
                 file_obj
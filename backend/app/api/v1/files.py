@@ -11,6 +11,7 @@ from pydantic import BaseModel, field_validator
 import os
 import uuid
 from datetime import datetime
+from pathlib import Path
 import logging
 import json
 from io import BytesIO
@@ -201,8 +202,9 @@ async def trigger_extraction_background(project_id: int):
                 # #endregion
                 
                 # Daten ins JSON-Modell integrieren
-                merged_data = extraction_service.merge_extracted_data(
-                    current_data.data_json.copy(),  # Kopie erstellen, um Referenzprobleme zu vermeiden
+                # Liefert ein neues Modell, current_data.data_json bleibt unverändert
+                merged_data, changed_keys = extraction_service.merge_extracted_data(
+                    current_data.data_json,
                     extracted_data,
                     file_obj
                 )
@@ -261,8 +263,9 @@ async def trigger_extraction_background(project_id: int):
                 current_data.data_json = merged_data
                 
                 # WICHTIG: SQLAlchemy muss explizit informiert werden, dass sich die JSON-Spalte geändert hat
-                from sqlalchemy.orm.attributes import flag_modified
-                flag_modified(current_data, "data_json")
+                if changed_keys:
+                    from sqlalchemy.orm.attributes import flag_modified
+                    flag_modified(current_data, "data_json")
                 
                 # Datei als verarbeitet markieren
                 file_obj.processed = True
@@ -443,6 +446,7 @@ async def upload_file(
         
         # Prüfen, ob es ein ZIP-Archiv ist
         if file_ext == ".zip":
+            extracted_files = []
             try:
                 # ZIP-Archiv extrahieren
                 zip_handler = ZIPHandler()
@@ -464,6 +468,10 @@ async def upload_file(
                     if extracted_ext not in settings.ALLOWED_EXTENSIONS:
                         continue  # Überspringe nicht erlaubte Dateien
                     
+                    # Große Dateien hat der ZIPHandler auf die Platte ausgelagert
+                    if isinstance(extracted_content, Path):
+                        extracted_content = extracted_content.read_bytes()
+                    
                     # Datei im Storage speichern
                     stored_filename = f"{uuid.uuid4()}{extracted_ext}"
                     file_path = await storage_service.save_file(
@@ -537,6 +545,8 @@ async def upload_file(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Fehler beim Verarbeiten des ZIP-Archivs: {str(e)}"
                 )
+            finally:
+                ZIPHandler.cleanup_spooled(f["content"] for f in extracted_files)
         
         else:
             # Normale Datei (nicht ZIP)
@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+import dataclasses
 
 from app.core.database import get_db
 from app.models.project import Project, ProjectData
@@ -21,6 +22,7 @@ class ValidationResponse(BaseModel):
     fehler: List[ValidationIssue]
     warnungen: List[ValidationIssue]
     hinweise: List[ValidationIssue]
+    truncated: bool = False  # True, wenn die Prüfung wegen zu vieler Fehler abgebrochen wurde
 
 
 @router.post("/project/{project_id}", response_model=ValidationResponse)
@@ -56,9 +58,10 @@ async def validate_project(
         
         data.data_json["pruefungs_ergebnisse"] = {
             "konsistenz_ok": validation_result["konsistenz_ok"],
-            "fehler": [issue.dict() for issue in validation_result["fehler"]],
-            "warnungen": [issue.dict() for issue in validation_result["warnungen"]],
-            "hinweise": [issue.dict() for issue in validation_result["hinweise"]]
+            "fehler": [dataclasses.asdict(issue) for issue in validation_result["fehler"]],
+            "warnungen": [dataclasses.asdict(issue) for issue in validation_result["warnungen"]],
+            "hinweise": [dataclasses.asdict(issue) for issue in validation_result["hinweise"]],
+            "truncated": validation_result["truncated"]
         }
         
         if validation_result["konsistenz_ok"]:
@@ -110,5 +113,6 @@ async def get_validation_issues(
         konsistenz_ok=results.get("konsistenz_ok"),
         fehler=[ValidationIssue(**issue) for issue in results.get("fehler", [])],
         warnungen=[ValidationIssue(**issue) for issue in results.get("warnungen", [])],
-        hinweise=[ValidationIssue(**issue) for issue in results.get("hinweise", [])]
+        hinweise=[ValidationIssue(**issue) for issue in results.get("hinweise", [])],
+        truncated=results.get("truncated", False)
     )
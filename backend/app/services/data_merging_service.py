@@ -3,7 +3,7 @@ Intelligentes Daten-Merging Service
 Erkennt Duplikate und löst Konflikte beim Zusammenführen von Daten
 """
 
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Set, Tuple
 from app.models.project import ProjectFile
 import difflib
 
@@ -16,10 +16,17 @@ class DataMergingService:
         current_data: Dict[str, Any],
         extracted_data: Dict[str, Any],
         source_file: ProjectFile
-    ) -> Dict[str, Any]:
+    ) -> Tuple[Dict[str, Any], Set[str]]:
         """
         Integriert extrahierte Daten ins bestehende JSON-Modell
         Mit intelligenter Duplikat-Erkennung und Konflikt-Auflösung
+        
+        current_data wird nicht verändert: Das Ergebnis ist ein neues Modell, das
+        unveränderte Top-Level-Einträge per Referenz übernimmt und nur die geänderten
+        neu aufbaut.
+        
+        Returns:
+            Tupel (neues Datenmodell, Menge der geänderten Top-Level-Keys)
         """
         source_info = {
             "datei": source_file.original_filename,
@@ -27,74 +34,78 @@ class DataMergingService:
             "upload_am": source_file.upload_date.isoformat() if source_file.upload_date else None
         }
         
+        new_data = dict(current_data)
+        changed_keys: Set[str] = set()
+        
         # Entitäten-Typen verarbeiten
         entity_types = ["raeume", "anlagen", "geraete", "anforderungen", "termine", "leistungen", "images"]
         
         for entity_type in entity_types:
-            if entity_type not in current_data:
-                current_data[entity_type] = []
+            if entity_type not in new_data:
+                new_data[entity_type] = []
+                changed_keys.add(entity_type)
             
             if entity_type not in extracted_data:
                 continue
             
             # Intelligentes Merging für jeden Entitätstyp
             if entity_type == "raeume":
-                current_data[entity_type] = self._merge_raeume(
-                    current_data[entity_type],
+                new_data[entity_type] = self._merge_raeume(
+                    new_data[entity_type],
                     extracted_data[entity_type],
                     source_info
                 )
             elif entity_type == "anlagen":
-                current_data[entity_type] = self._merge_anlagen(
-                    current_data[entity_type],
+                new_data[entity_type] = self._merge_anlagen(
+                    new_data[entity_type],
                     extracted_data[entity_type],
                     source_info
                 )
             elif entity_type == "geraete":
-                current_data[entity_type] = self._merge_geraete(
-                    current_data[entity_type],
+                new_data[entity_type] = self._merge_geraete(
+                    new_data[entity_type],
                     extracted_data[entity_type],
                     source_info
                 )
             elif entity_type == "anforderungen":
-                current_data[entity_type] = self._merge_anforderungen(
-                    current_data[entity_type],
+                new_data[entity_type] = self._merge_anforderungen(
+                    new_data[entity_type],
                     extracted_data[entity_type],
                     source_info
                 )
             elif entity_type == "termine":
-                current_data[entity_type] = self._merge_termine(
-                    current_data[entity_type],
+                new_data[entity_type] = self._merge_termine(
+                    new_data[entity_type],
                     extracted_data[entity_type],
                     source_info
                 )
             elif entity_type == "leistungen":
-                current_data[entity_type] = self._merge_leistungen(
-                    current_data[entity_type],
+                new_data[entity_type] = self._merge_leistungen(
+                    new_data[entity_type],
                     extracted_data[entity_type],
                     source_info
                 )
             elif entity_type == "images":
                 # Bilder einfach hinzufügen (keine Duplikat-Erkennung nötig)
-                if entity_type not in current_data:
-                    current_data[entity_type] = []
+                images = list(new_data[entity_type])
                 for img in extracted_data[entity_type]:
                     img["quelle"] = {**source_info, **img.get("quelle", {})}
-                    current_data[entity_type].append(img)
+                    images.append(img)
+                new_data[entity_type] = images
+            changed_keys.add(entity_type)
         
         # Raw Tables mergen (wichtig: alle Tabellen müssen erhalten bleiben)
-        current_data = self._merge_raw_tables(current_data, extracted_data, source_info)
+        changed_keys |= self._merge_raw_tables(new_data, extracted_data, source_info)
         
         # Metadata mergen (pro Datei speichern)
-        current_data = self._merge_metadata(current_data, extracted_data, source_info, source_file.id)
+        changed_keys |= self._merge_metadata(new_data, extracted_data, source_info, source_file.id)
         
         # Full Text mergen (unstrukturierte Textdaten)
-        current_data = self._merge_full_text(current_data, extracted_data, source_info)
+        changed_keys |= self._merge_full_text(new_data, extracted_data, source_info)
         
         # Projekt-Metadaten aktualisieren
-        if "projekt" in current_data:
-            if "dateien" not in current_data["projekt"]:
-                current_data["projekt"]["dateien"] = []
+        if "projekt" in new_data:
+            dateien = new_data["projekt"].get("dateien", [])
             
             file_entry = {
                 "name": source_file.original_filename,
@@ -103,10 +114,11 @@ class DataMergingService:
                 "revision": source_file.revision or "-"
             }
             
-            if not any(f["name"] == file_entry["name"] for f in current_data["projekt"]["dateien"]):
-                current_data["projekt"]["dateien"].append(file_entry)
+            if not any(f["name"] == file_entry["name"] for f in dateien):
+                new_data["projekt"] = {**new_data["projekt"], "dateien": [*dateien, file_entry]}
+                changed_keys.add("projekt")
         
-        return current_data
+        return new_data, changed_keys
     
     def _merge_raeume(
         self,
@@ -184,6 +196,9 @@ class DataMergingService:
             merged["quelle"] = []
         elif not isinstance(merged["quelle"], list):
             merged["quelle"] = [merged["quelle"]]
+        else:
+            # Liste gehört noch zur vorherigen Modellversion
+            merged["quelle"] = list(merged["quelle"])
         
         if "quelle" in new:
             if isinstance(new["quelle"], list):
@@ -203,8 +218,7 @@ class DataMergingService:
                     # Bei Zahlen: Konflikt markieren wenn unterschiedlich
                     if abs(value - merged[key]) > 0.01:
                         # Konflikt - behalte beide Werte mit Quelle
-                        if "konflikte" not in merged:
-                            merged["konflikte"] = {}
+                        merged["konflikte"] = dict(merged.get("konflikte", {}))
                         merged["konflikte"][key] = {
                             "alt": merged[key],
                             "neu": value,
@@ -277,6 +291,9 @@ class DataMergingService:
             merged["quelle"] = []
         elif not isinstance(merged["quelle"], list):
             merged["quelle"] = [merged["quelle"]]
+        else:
+            # Liste gehört noch zur vorherigen Modellversion
+            merged["quelle"] = list(merged["quelle"])
         
         if "quelle" in new:
             if isinstance(new["quelle"], list):
@@ -367,6 +384,9 @@ class DataMergingService:
             merged["quelle"] = []
         elif not isinstance(merged["quelle"], list):
             merged["quelle"] = [merged["quelle"]]
+        else:
+            # Liste gehört noch zur vorherigen Modellversion
+            merged["quelle"] = list(merged["quelle"])
         
         if "quelle" in new:
             if isinstance(new["quelle"], list):
@@ -458,6 +478,9 @@ class DataMergingService:
             merged["quelle"] = []
         elif not isinstance(merged["quelle"], list):
             merged["quelle"] = [merged["quelle"]]
+        else:
+            # Liste gehört noch zur vorherigen Modellversion
+            merged["quelle"] = list(merged["quelle"])
         
         if "quelle" in new:
             if isinstance(new["quelle"], list):
@@ -484,19 +507,24 @@ class DataMergingService:
     
     def _merge_raw_tables(
         self,
-        current_data: Dict[str, Any],
+        data: Dict[str, Any],
         extracted_data: Dict[str, Any],
         source_info: Dict[str, Any]
-    ) -> Dict[str, Any]:
+    ) -> Set[str]:
         """
-        Mergt raw_tables aus extracted_data in current_data
+        Mergt raw_tables aus extracted_data in data (neue Liste, bestehende bleibt unverändert)
         Wichtig: Alle Tabellen müssen erhalten bleiben (keine Duplikat-Erkennung)
-        """
-        if "raw_tables" not in current_data:
-            current_data["raw_tables"] = []
         
+        Returns:
+            Geänderte Top-Level-Keys
+        """
         if "raw_tables" not in extracted_data:
-            return current_data
+            if "raw_tables" in data:
+                return set()
+            data["raw_tables"] = []
+            return {"raw_tables"}
+        
+        raw_tables = list(data.get("raw_tables", []))
         
         # Alle raw_tables aus extracted_data hinzufügen
         for table in extracted_data["raw_tables"]:
@@ -504,26 +532,30 @@ class DataMergingService:
             if "quelle" not in table:
                 table["quelle"] = {}
             table["quelle"] = {**source_info, **table.get("quelle", {})}
-            current_data["raw_tables"].append(table)
+            raw_tables.append(table)
         
-        return current_data
+        data["raw_tables"] = raw_tables
+        return {"raw_tables"}
     
     def _merge_metadata(
         self,
-        current_data: Dict[str, Any],
+        data: Dict[str, Any],
         extracted_data: Dict[str, Any],
         source_info: Dict[str, Any],
         file_id: int
-    ) -> Dict[str, Any]:
+    ) -> Set[str]:
         """
-        Mergt metadata aus extracted_data in current_data
+        Mergt metadata aus extracted_data in data (neues Dict, bestehendes bleibt unverändert)
         Metadaten werden pro Datei gespeichert: metadata[file_id] = {...}
-        """
-        if "metadata" not in current_data:
-            current_data["metadata"] = {}
         
+        Returns:
+            Geänderte Top-Level-Keys
+        """
         if "metadata" not in extracted_data:
-            return current_data
+            if "metadata" in data:
+                return set()
+            data["metadata"] = {}
+            return {"metadata"}
         
         # Metadaten pro Datei speichern
         file_metadata = extracted_data["metadata"].copy()
@@ -532,25 +564,29 @@ class DataMergingService:
         file_metadata["quelle"] = {**source_info, **file_metadata.get("quelle", {})}
         
         # Metadaten unter file_id speichern
-        current_data["metadata"][str(file_id)] = file_metadata
-        
-        return current_data
+        data["metadata"] = {**data.get("metadata", {}), str(file_id): file_metadata}
+        return {"metadata"}
     
     def _merge_full_text(
         self,
-        current_data: Dict[str, Any],
+        data: Dict[str, Any],
         extracted_data: Dict[str, Any],
         source_info: Dict[str, Any]
-    ) -> Dict[str, Any]:
+    ) -> Set[str]:
         """
-        Mergt full_text aus extracted_data in current_data
+        Mergt full_text aus extracted_data in data (neue Liste, bestehende bleibt unverändert)
         Unstrukturierte Textdaten werden als Array gespeichert mit Quellenangabe
-        """
-        if "full_text" not in current_data:
-            current_data["full_text"] = []
         
+        Returns:
+            Geänderte Top-Level-Keys
+        """
         if "full_text" not in extracted_data:
-            return current_data
+            if "full_text" in data:
+                return set()
+            data["full_text"] = []
+            return {"full_text"}
+        
+        full_text = list(data.get("full_text", []))
         
         # full_text kann ein Array oder ein String sein
         new_full_text = extracted_data["full_text"]
@@ -558,7 +594,7 @@ class DataMergingService:
         if isinstance(new_full_text, str):
             # Wenn es ein String ist, in ein Array mit einem Eintrag umwandeln
             if new_full_text.strip():
-                current_data["full_text"].append({
+                full_text.append({
                     "content": new_full_text,
                     "quelle": source_info
                 })
@@ -568,13 +604,14 @@ class DataMergingService:
                 if isinstance(text_entry, str):
                     # Einfacher String - in Dict umwandeln
                     if text_entry.strip():
-                        current_data["full_text"].append({
+                        full_text.append({
                             "content": text_entry,
                             "quelle": source_info
                         })
                 elif isinstance(text_entry, dict):
                     # Bereits ein Dict - Quelle hinzufügen/aktualisieren
                     text_entry["quelle"] = {**source_info, **text_entry.get("quelle", {})}
-                    current_data["full_text"].append(text_entry)
+                    full_text.append(text_entry)
         
-        return current_data
\ No newline at end of file
+        data["full_text"] = full_text
+        return {"full_text"}
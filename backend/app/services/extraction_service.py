@@ -4,7 +4,7 @@ Koordiniert die verschiedenen Parser-Module
 """
 
 from sqlalchemy.orm import Session
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set, Tuple
 from app.models.project import ProjectFile
 from app.services.storage import StorageService
 from app.services.data_merging_service import DataMergingService
@@ -115,10 +115,13 @@ class ExtractionService:
         current_data: Dict[str, Any],
         extracted_data: Dict[str, Any],
         source_file: ProjectFile
-    ) -> Dict[str, Any]:
+    ) -> Tuple[Dict[str, Any], Set[str]]:
         """
         Integriert extrahierte Daten ins bestehende JSON-Modell
         Verwendet intelligentes Merging mit Duplikat-Erkennung
+        
+        Returns:
+            Tupel (neues Datenmodell, geänderte Top-Level-Keys); current_data bleibt unverändert
         """
         return self.merging_service.merge_extracted_data(
             current_data,
@@ -18,8 +18,11 @@ class QuestionService:
         Generiert Fragenliste basierend auf Validierungsproblemen
         Returns: Liste von Fragen mit Kategorien
         """
-        # Validierung durchführen
-        validation_result = await self.validation_service.validate_project_data(project_data)
+        # Validierung vollständig durchführen (ohne max_errors-Abbruch), damit jede
+        # gefundene Abweichung zu einer Frage wird
+        validation_result = await self.validation_service.validate_project_data(
+            project_data, max_errors=None
+        )
         
         questions = []
         
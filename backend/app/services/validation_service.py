@@ -3,104 +3,275 @@ Validierungs-Service
 Führt Konsistenzprüfungen und YAML-Abgleich durch
 """
 
-from typing import Dict, Any, List
-from pydantic import BaseModel
+from typing import Dict, Any, Final, Iterable, Iterator, List, Tuple
+from pathlib import Path
+from pydantic import field_validator
+from pydantic.dataclasses import dataclass
+import asyncio
+import functools
+import numpy as np
 import yaml
 import os
+import sys
 
 
-class ValidationIssue(BaseModel):
-    """Einzelnes Validierungsproblem"""
+# Kategorien und Schweregrade (interniert, damit Vergleiche meist per Identität entschieden werden)
+KAT_WIDERSPRUCH: Final[str] = sys.intern("Widerspruch")
+KAT_PLAUSIBILITAET: Final[str] = sys.intern("Plausibilitätsfehler")
+KAT_REFERENZFEHLER: Final[str] = sys.intern("Referenzfehler")
+KAT_FEHLENDE_ANGABE: Final[str] = sys.intern("Fehlende Angabe")
+
+SCHWERE_KRITISCH: Final[str] = sys.intern("kritisch")
+SCHWERE_WARNUNG: Final[str] = sys.intern("warnung")
+SCHWERE_HINWEIS: Final[str] = sys.intern("hinweis")
+
+# Ab dieser Anzahl (Referenzen + bekannte IDs) wird der Referenzabgleich vektorisiert
+NUMPY_REFERENCE_THRESHOLD = 1000
+
+OFFERTE_SPEC_PATH = Path(__file__).parent.parent.parent / "config" / "offerte_spec.yaml"
+
+
+@functools.lru_cache(maxsize=4)
+def _load_offerte_spec(path: str, mtime_ns: int) -> Dict[str, Any] | None:
+    """
+    Lädt die YAML-Offertvorgabe einmal pro Prozess
+    Die Änderungszeit ist Teil des Cache-Schlüssels, damit eine geänderte Datei neu gelesen wird
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+@dataclass(slots=True, frozen=True)
+class ValidationIssue:
+    """
+    Einzelnes Validierungsproblem
+    Als Pydantic-Dataclass mit __slots__ (kein __dict__ pro Instanz), da pro Validierung
+    tausende Issues entstehen können; Serialisierung über dataclasses.asdict
+    """
     kategorie: str
     beschreibung: str
     fundstellen: List[str]
     schweregrad: str
     empfehlung: str
     betroffene_entitaet: str | None = None
+    
+    @field_validator("kategorie", "schweregrad")
+    @classmethod
+    def _intern(cls, value: str) -> str:
+        """Kategorie/Schweregrad haben nur wenige Ausprägungen - gemeinsame String-Objekte verwenden"""
+        return sys.intern(value)
 
 
 class ValidationService:
     """Service für Projekt-Validierung"""
     
     def __init__(self):
-        import os
-        from pathlib import Path
-        # YAML-Offertvorgabe laden
-        config_dir = Path(__file__).parent.parent.parent / "config"
-        self.offerte_spec_path = config_dir / "offerte_spec.yaml"
+        # YAML-Offertvorgabe laden (prozessweit gecacht, nicht verändern)
+        self.offerte_spec_path = OFFERTE_SPEC_PATH
         self.offerte_spec = None
-        if self.offerte_spec_path.exists():
-            with open(self.offerte_spec_path, 'r', encoding='utf-8') as f:
-                self.offerte_spec = yaml.safe_load(f)
+        try:
+            mtime_ns = os.stat(self.offerte_spec_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+        if mtime_ns is not None:
+            self.offerte_spec = _load_offerte_spec(str(self.offerte_spec_path), mtime_ns)
+        
+        # Mindestanforderungen einmalig aus der Vorgabe auflösen, damit die Prüfung
+        # pro Validierung nicht mehr durch den YAML-Baum navigieren muss
+        mindestanforderungen = (self.offerte_spec or {}).get("mindestanforderungen", {})
+        self._projekt_pflichtfelder = tuple(
+            mindestanforderungen.get("projekt", {}).get("erforderliche_felder", [])
+        )
+        self._min_anzahl_raeume = mindestanforderungen.get("raeume", {}).get("min_anzahl", 0)
+        self._raum_pflichtfelder = tuple(
+            mindestanforderungen.get("raeume", {}).get("erforderliche_felder", [])
+        )
+        self._anlage_pflichtfelder = tuple(
+            mindestanforderungen.get("anlagen", {}).get("erforderliche_felder", [])
+        )
+    
+    @classmethod
+    def invalidate_spec_cache(cls) -> None:
+        """Verwirft die gecachte Offertvorgabe (z.B. nach manueller Änderung im Dev-Betrieb)"""
+        _load_offerte_spec.cache_clear()
     
-    async def validate_project_data(self, project_data: Dict[str, Any]) -> Dict[str, List[ValidationIssue]]:
+    async def validate_project_data(
+        self,
+        project_data: Dict[str, Any],
+        max_errors: int | None = 500
+    ) -> Dict[str, Any]:
         """
         Führt alle Validierungsprüfungen durch
-        Returns: Dict mit fehler, warnungen, hinweise und konsistenz_ok Flag
+        Bei mehr als max_errors kritischen Fehlern werden die restlichen Prüfungen
+        übersprungen (None = immer alle Prüfungen ausführen)
+        Returns: Dict mit fehler, warnungen, hinweise, konsistenz_ok und truncated Flag
         """
         fehler = []
         warnungen = []
         hinweise = []
         
+        # Entitätslisten einmalig auflösen und an die Prüfungen übergeben
+        projekt = project_data.get("projekt", {}) or {}
+        raeume = project_data.get("raeume", []) or []
+        anlagen = project_data.get("anlagen", []) or []
+        geraete = project_data.get("geraete", []) or []
+        leistungen = project_data.get("leistungen", []) or []
+        termine = project_data.get("termine", []) or []
+        
+        # Raumdaten spaltenweise und Fundstellen je Entität einmalig aufbereiten
+        # (von mehreren Prüfungen genutzt)
+        raum_cols = self._build_raum_columns(raeume)
+        fundstellen_index = self._build_fundstellen_index(raeume, anlagen, geraete, termine)
+        
+        # Die Prüfungen sind Generatoren und werden nacheinander in einem Worker-Thread
+        # direkt in die Ergebnislisten verteilt, damit der Event-Loop nicht blockiert
+        # wird und nach jeder Prüfung abgebrochen werden kann
+        
         # 1. Datenkonsistenz prüfen
-        consistency_issues = self._check_data_consistency(project_data)
-        fehler.extend([i for i in consistency_issues if i.schweregrad == "kritisch"])
-        warnungen.extend([i for i in consistency_issues if i.schweregrad == "warnung"])
+        await asyncio.to_thread(
+            self._bucketize,
+            self._check_data_consistency(
+                raum_cols=raum_cols, anlagen=anlagen, fundstellen_index=fundstellen_index
+            ),
+            {SCHWERE_KRITISCH: fehler, SCHWERE_WARNUNG: warnungen}
+        )
+        if max_errors and len(fehler) >= max_errors:
+            return self._build_result(fehler, warnungen, hinweise, truncated=True)
         
         # 2. Referenzintegrität prüfen
-        reference_issues = self._check_reference_integrity(project_data)
-        fehler.extend([i for i in reference_issues if i.schweregrad == "kritisch"])
-        warnungen.extend([i for i in reference_issues if i.schweregrad == "warnung"])
+        await asyncio.to_thread(
+            self._bucketize,
+            self._check_reference_integrity(
+                raeume=raeume, anlagen=anlagen, geraete=geraete, leistungen=leistungen, termine=termine,
+                fundstellen_index=fundstellen_index
+            ),
+            {SCHWERE_KRITISCH: fehler, SCHWERE_WARNUNG: warnungen}
+        )
+        if max_errors and len(fehler) >= max_errors:
+            return self._build_result(fehler, warnungen, hinweise, truncated=True)
         
         # 3. Numerische Plausibilität prüfen
-        plausibility_issues = self._check_numerical_plausibility(project_data)
-        warnungen.extend([i for i in plausibility_issues if i.schweregrad == "warnung"])
-        hinweise.extend([i for i in plausibility_issues if i.schweregrad == "hinweis"])
+        await asyncio.to_thread(
+            self._bucketize,
+            self._check_numerical_plausibility(
+                raum_cols=raum_cols, anlagen=anlagen, geraete=geraete, fundstellen_index=fundstellen_index
+            ),
+            {SCHWERE_WARNUNG: warnungen, SCHWERE_HINWEIS: hinweise}
+        )
         
         # 4. YAML-Offertvorgabe abgleichen (falls vorhanden)
         if self.offerte_spec:
-            yaml_issues = await self._check_offerte_spec(project_data)
-            fehler.extend([i for i in yaml_issues if i.schweregrad == "kritisch"])
-            warnungen.extend([i for i in yaml_issues if i.schweregrad == "warnung"])
-        
-        konsistenz_ok = len(fehler) == 0
+            await asyncio.to_thread(
+                self._bucketize,
+                self._check_offerte_spec(
+                    projekt=projekt, raeume=raeume, anlagen=anlagen, fundstellen_index=fundstellen_index
+                ),
+                {SCHWERE_KRITISCH: fehler, SCHWERE_WARNUNG: warnungen}
+            )
         
+        return self._build_result(fehler, warnungen, hinweise, truncated=False)
+    
+    def _bucketize(self, issues: Iterable[ValidationIssue], buckets: Dict[str, List[ValidationIssue]]) -> None:
+        """
+        Verteilt Issues in einem Durchlauf auf die Ergebnislisten
+        Schweregrade ohne Eintrag in buckets werden von der jeweiligen Prüfung nicht übernommen
+        """
+        for issue in issues:
+            bucket = buckets.get(issue.schweregrad)
+            if bucket is not None:
+                bucket.append(issue)
+    
+    def _build_result(
+        self,
+        fehler: List[ValidationIssue],
+        warnungen: List[ValidationIssue],
+        hinweise: List[ValidationIssue],
+        truncated: bool
+    ) -> Dict[str, Any]:
+        """Stellt das Validierungsergebnis zusammen"""
         return {
-            "konsistenz_ok": konsistenz_ok,
+            "konsistenz_ok": len(fehler) == 0,
             "fehler": fehler,
             "warnungen": warnungen,
-            "hinweise": hinweise
+            "hinweise": hinweise,
+            "truncated": truncated
         }
     
-    def _check_data_consistency(self, data: Dict[str, Any]) -> List[ValidationIssue]:
-        """Prüft Datenkonsistenz (z.B. gleiche Raumnummern müssen gleiche Fläche haben)"""
-        issues = []
+    def _build_raum_columns(self, raeume: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Überführt die Raumliste in eine spaltenweise Darstellung
+        Die Rohwerte bleiben für die Meldungstexte erhalten, die Zahlenspalten
+        liegen zusätzlich als float-Arrays (None -> NaN) für vektorisierte Prüfungen vor
+        """
+        ids, nummern, flaechen, volumen, hoehen = [], [], [], [], []
+        for raum in raeume:
+            ids.append(raum.get("id"))
+            # Kleingeschriebene Raumnummern internieren: gleiche Nummern teilen ein Objekt samt Hash
+            nummern.append(sys.intern(raum.get("nummer", "").lower()))
+            flaechen.append(raum.get("flaeche_m2"))
+            volumen.append(raum.get("volumen_m3"))
+            hoehen.append(raum.get("hoehe_m"))
         
+        def as_array(values: List[Any]) -> np.ndarray:
+            return np.array([np.nan if v is None else v for v in values], dtype=float)
+        
+        return {
+            "raeume": raeume,
+            "id": ids,
+            "nummer": nummern,
+            "flaeche_m2": flaechen,
+            "volumen_m3": volumen,
+            "hoehe_m": hoehen,
+            "flaeche_arr": as_array(flaechen),
+            "volumen_arr": as_array(volumen),
+            "hoehe_arr": as_array(hoehen),
+        }
+    
+    def _check_data_consistency(
+        self,
+        raum_cols: Dict[str, Any],
+        anlagen: List[Dict[str, Any]],
+        fundstellen_index: Dict[int, Tuple[str, ...]]
+    ) -> Iterator[ValidationIssue]:
+        """Prüft Datenkonsistenz (z.B. gleiche Raumnummern müssen gleiche Fläche haben)"""
         # Räume: Gleiche ID/Nummer muss gleiche Fläche haben
-        raeume = data.get("raeume", [])
         raum_dict = {}
         raum_by_nummer = {}
         
-        for raum in raeume:
-            raum_id = raum.get("id")
-            raum_nummer = raum.get("nummer", "").lower()
-            flaeche = raum.get("flaeche_m2")
-            volumen = raum.get("volumen_m3")
-            hoehe = raum.get("hoehe_m")
+        # Volumen = Fläche × Höhe (nur wenn alle Werte vorhanden und ungleich 0), Toleranz 0.5 m³
+        flaeche_arr = raum_cols["flaeche_arr"]
+        volumen_arr = raum_cols["volumen_arr"]
+        hoehe_arr = raum_cols["hoehe_arr"]
+        # |Fläche × Höhe - Volumen| in einem wiederverwendeten Puffer berechnen;
+        # NaN (fehlende Werte) ergibt beim Vergleich False
+        tmp = np.empty_like(volumen_arr)
+        np.multiply(flaeche_arr, hoehe_arr, out=tmp)
+        np.subtract(tmp, volumen_arr, out=tmp)
+        np.abs(tmp, out=tmp)
+        mask = tmp > 0.5
+        mask &= (flaeche_arr != 0) & (volumen_arr != 0) & (hoehe_arr != 0)
+        volumen_abweichend = set(np.flatnonzero(mask).tolist())
+        
+        for idx, raum in enumerate(raum_cols["raeume"]):
+            raum_id = raum_cols["id"][idx]
+            raum_nummer = raum_cols["nummer"][idx]
+            flaeche = raum_cols["flaeche_m2"][idx]
+            volumen = raum_cols["volumen_m3"][idx]
+            hoehe = raum_cols["hoehe_m"][idx]
             
             # Prüfe ID-Duplikate
             if raum_id in raum_dict:
                 existing = raum_dict[raum_id]
                 existing_flaeche = existing.get("flaeche_m2")
                 if existing_flaeche and flaeche and abs(existing_flaeche - flaeche) > 0.1:
-                    issues.append(ValidationIssue(
-                        kategorie="Widerspruch",
+                    yield ValidationIssue(
+                        kategorie=KAT_WIDERSPRUCH,
                         beschreibung=f"Raum {raum_id} hat unterschiedliche Flächenangaben: {existing_flaeche} m² vs {flaeche} m²",
-                        fundstellen=self._get_fundstellen([existing, raum]),
-                        schweregrad="kritisch",
+                        fundstellen=self._get_fundstellen([existing, raum], fundstellen_index),
+                        schweregrad=SCHWERE_KRITISCH,
                         empfehlung=f"Bitte Flächenangabe für Raum {raum_id} prüfen und vereinheitlichen",
                         betroffene_entitaet=raum_id
-                    ))
+                    )
             else:
                 raum_dict[raum_id] = raum
             
@@ -109,32 +280,30 @@ class ValidationService:
                 existing = raum_by_nummer[raum_nummer]
                 existing_flaeche = existing.get("flaeche_m2")
                 if existing_flaeche and flaeche and abs(existing_flaeche - flaeche) > 0.1:
-                    issues.append(ValidationIssue(
-                        kategorie="Widerspruch",
+                    yield ValidationIssue(
+                        kategorie=KAT_WIDERSPRUCH,
                         beschreibung=f"Raum mit Nummer '{raum_nummer}' hat unterschiedliche Flächenangaben: {existing_flaeche} m² vs {flaeche} m²",
-                        fundstellen=self._get_fundstellen([existing, raum]),
-                        schweregrad="kritisch",
+                        fundstellen=self._get_fundstellen([existing, raum], fundstellen_index),
+                        schweregrad=SCHWERE_KRITISCH,
                         empfehlung=f"Bitte Flächenangabe für Raum {raum_nummer} prüfen und vereinheitlichen",
                         betroffene_entitaet=raum_id
-                    ))
+                    )
             else:
                 raum_by_nummer[raum_nummer] = raum
             
-            # Prüfe Volumen = Fläche × Höhe (wenn alle vorhanden)
-            if flaeche and hoehe and volumen:
+            # Prüfe Volumen = Fläche × Höhe (vorab vektorisiert berechnet)
+            if idx in volumen_abweichend:
                 expected_volumen = flaeche * hoehe
-                if abs(volumen - expected_volumen) > 0.5:  # Toleranz 0.5 m³
-                    issues.append(ValidationIssue(
-                        kategorie="Plausibilitätsfehler",
-                        beschreibung=f"Raum {raum_id}: Volumen ({volumen} m³) stimmt nicht mit Fläche × Höhe ({expected_volumen} m³) überein",
-                        fundstellen=self._get_fundstellen([raum]),
-                        schweregrad="warnung",
-                        empfehlung=f"Bitte Volumen oder Höhe für Raum {raum_id} prüfen",
-                        betroffene_entitaet=raum_id
-                    ))
+                yield ValidationIssue(
+                    kategorie=KAT_PLAUSIBILITAET,
+                    beschreibung=f"Raum {raum_id}: Volumen ({volumen} m³) stimmt nicht mit Fläche × Höhe ({expected_volumen} m³) überein",
+                    fundstellen=self._get_fundstellen([raum], fundstellen_index),
+                    schweregrad=SCHWERE_WARNUNG,
+                    empfehlung=f"Bitte Volumen oder Höhe für Raum {raum_id} prüfen",
+                    betroffene_entitaet=raum_id
+                )
         
         # Anlagen: Gleiche ID muss gleiche Leistung haben
-        anlagen = data.get("anlagen", [])
         anlage_dict = {}
         
         for anlage in anlagen:
@@ -145,333 +314,378 @@ class ValidationService:
                 existing = anlage_dict[anlage_id]
                 existing_leistung = existing.get("leistung_kw")
                 if existing_leistung and leistung_kw and abs(existing_leistung - leistung_kw) > 0.1:
-                    issues.append(ValidationIssue(
-                        kategorie="Widerspruch",
+                    yield ValidationIssue(
+                        kategorie=KAT_WIDERSPRUCH,
                         beschreibung=f"Anlage {anlage_id} hat unterschiedliche Leistungsangaben: {existing_leistung} kW vs {leistung_kw} kW",
-                        fundstellen=self._get_fundstellen([existing, anlage]),
-                        schweregrad="kritisch",
+                        fundstellen=self._get_fundstellen([existing, anlage], fundstellen_index),
+                        schweregrad=SCHWERE_KRITISCH,
                         empfehlung=f"Bitte Leistungsangabe für Anlage {anlage_id} prüfen und vereinheitlichen",
                         betroffene_entitaet=anlage_id
-                    ))
+                    )
             else:
                 anlage_dict[anlage_id] = anlage
-        
-        return issues
     
-    def _get_fundstellen(self, entities: List[Dict[str, Any]]) -> List[str]:
-        """Extrahiert Fundstellen aus Entitäten"""
+    def _build_fundstellen_index(self, *entity_lists: List[Dict[str, Any]]) -> Dict[int, Tuple[str, ...]]:
+        """
+        Ermittelt die Fundstellen jeder Entität einmalig
+        Schlüssel ist id(entity), gültig solange die Projektdaten der laufenden Validierung leben
+        """
+        index = {}
+        for entities in entity_lists:
+            for entity in entities:
+                index[id(entity)] = self._extract_fundstellen(entity)
+        return index
+    
+    def _extract_fundstellen(self, entity: Dict[str, Any]) -> Tuple[str, ...]:
+        """Extrahiert die Dateinamen aus der Quellenangabe einer Entität (ohne Duplikate)"""
+        quelle = entity.get("quelle", {})
+        if isinstance(quelle, dict):
+            return (quelle.get("datei", "unbekannt"),)
+        if isinstance(quelle, list):
+            return tuple(dict.fromkeys(q.get("datei", "unbekannt") for q in quelle))
+        return ()
+    
+    def _get_fundstellen(
+        self,
+        entities: List[Dict[str, Any]],
+        fundstellen_index: Dict[int, Tuple[str, ...]]
+    ) -> List[str]:
+        """Liefert die Fundstellen der Entitäten aus dem vorberechneten Index"""
+        if len(entities) == 1:
+            return list(fundstellen_index[id(entities[0])])
         fundstellen = []
+        seen = set()
         for entity in entities:
-            quelle = entity.get("quelle", {})
-            if isinstance(quelle, dict):
-                datei = quelle.get("datei", "unbekannt")
-                if datei not in fundstellen:
+            for datei in fundstellen_index[id(entity)]:
+                if datei not in seen:
+                    seen.add(datei)
                     fundstellen.append(datei)
-            elif isinstance(quelle, list):
-                for q in quelle:
-                    datei = q.get("datei", "unbekannt")
-                    if datei not in fundstellen:
-                        fundstellen.append(datei)
         return fundstellen
     
-    def _check_reference_integrity(self, data: Dict[str, Any]) -> List[ValidationIssue]:
+    def _check_reference_integrity(
+        self,
+        raeume: List[Dict[str, Any]],
+        anlagen: List[Dict[str, Any]],
+        geraete: List[Dict[str, Any]],
+        leistungen: List[Dict[str, Any]],
+        termine: List[Dict[str, Any]],
+        fundstellen_index: Dict[int, Tuple[str, ...]]
+    ) -> Iterator[ValidationIssue]:
         """Prüft Referenzintegrität (z.B. Gerät referenziert existierenden Raum)"""
-        issues = []
-        
-        raeume_ids = {r.get("id") for r in data.get("raeume", [])}
-        anlagen_ids = {a.get("id") for a in data.get("anlagen", [])}
-        geraete_ids = {g.get("id") for g in data.get("geraete", [])}
-        leistungen_ids = {l.get("id") for l in data.get("leistungen", [])}
+        raeume_ids = {r.get("id") for r in raeume}
+        anlagen_ids = {a.get("id") for a in anlagen}
+        geraete_ids = {g.get("id") for g in geraete}
+        leistungen_ids = {l.get("id") for l in leistungen}
         
         # Geräte-Referenzen prüfen
-        geraete = data.get("geraete", [])
         for geraet in geraete:
             geraet_id = geraet.get("id")
             zugehoerige_anlage = geraet.get("zugehoerige_anlage")
             zugehoeriger_raum = geraet.get("zugehoeriger_raum")
             
             if not zugehoerige_anlage and not zugehoeriger_raum:
-                issues.append(ValidationIssue(
-                    kategorie="Fehlende Angabe",
+                yield ValidationIssue(
+                    kategorie=KAT_FEHLENDE_ANGABE,
                     beschreibung=f"Gerät {geraet_id} ist keinem Raum oder keiner Anlage zugeordnet",
-                    fundstellen=self._get_fundstellen([geraet]),
-                    schweregrad="warnung",
+                    fundstellen=self._get_fundstellen([geraet], fundstellen_index),
+                    schweregrad=SCHWERE_WARNUNG,
                     empfehlung=f"Bitte Zuordnung für Gerät {geraet_id} ergänzen",
                     betroffene_entitaet=geraet_id
-                ))
+                )
             elif zugehoerige_anlage and zugehoerige_anlage not in anlagen_ids:
-                issues.append(ValidationIssue(
-                    kategorie="Referenzfehler",
+                yield ValidationIssue(
+                    kategorie=KAT_REFERENZFEHLER,
                     beschreibung=f"Gerät {geraet_id} referenziert nicht existierende Anlage {zugehoerige_anlage}",
-                    fundstellen=self._get_fundstellen([geraet]),
-                    schweregrad="kritisch",
+                    fundstellen=self._get_fundstellen([geraet], fundstellen_index),
+                    schweregrad=SCHWERE_KRITISCH,
                     empfehlung=f"Bitte Anlage {zugehoerige_anlage} prüfen oder Gerät korrigieren",
                     betroffene_entitaet=geraet_id
-                ))
+                )
             elif zugehoeriger_raum and zugehoeriger_raum not in raeume_ids:
-                issues.append(ValidationIssue(
-                    kategorie="Referenzfehler",
+                yield ValidationIssue(
+                    kategorie=KAT_REFERENZFEHLER,
                     beschreibung=f"Gerät {geraet_id} referenziert nicht existierenden Raum {zugehoeriger_raum}",
-                    fundstellen=self._get_fundstellen([geraet]),
-                    schweregrad="kritisch",
+                    fundstellen=self._get_fundstellen([geraet], fundstellen_index),
+                    schweregrad=SCHWERE_KRITISCH,
                     empfehlung=f"Bitte Raum {zugehoeriger_raum} prüfen oder Gerät korrigieren",
                     betroffene_entitaet=geraet_id
-                ))
+                )
         
         # Anlagen-Referenzen prüfen
-        anlagen = data.get("anlagen", [])
-        for anlage in anlagen:
+        anlage_fehlende_raeume = self._missing_references(
+            [a.get("zugehoerige_raeume", []) for a in anlagen], raeume_ids
+        )
+        anlage_fehlende_geraete = self._missing_references(
+            [a.get("zugehoerige_geraete", []) for a in anlagen], geraete_ids
+        )
+        for anlage, fehlende_raeume, fehlende_geraete in zip(anlagen, anlage_fehlende_raeume, anlage_fehlende_geraete):
             anlage_id = anlage.get("id")
-            zugehoerige_raeume = anlage.get("zugehoerige_raeume", [])
-            zugehoerige_geraete = anlage.get("zugehoerige_geraete", [])
             
-            for raum_id in zugehoerige_raeume:
-                if raum_id not in raeume_ids:
-                    issues.append(ValidationIssue(
-                        kategorie="Referenzfehler",
-                        beschreibung=f"Anlage {anlage_id} referenziert nicht existierenden Raum {raum_id}",
-                        fundstellen=self._get_fundstellen([anlage]),
-                        schweregrad="kritisch",
-                        empfehlung=f"Bitte Raum {raum_id} prüfen oder Anlage korrigieren",
-                        betroffene_entitaet=anlage_id
-                    ))
+            for raum_id in fehlende_raeume:
+                yield ValidationIssue(
+                    kategorie=KAT_REFERENZFEHLER,
+                    beschreibung=f"Anlage {anlage_id} referenziert nicht existierenden Raum {raum_id}",
+                    fundstellen=self._get_fundstellen([anlage], fundstellen_index),
+                    schweregrad=SCHWERE_KRITISCH,
+                    empfehlung=f"Bitte Raum {raum_id} prüfen oder Anlage korrigieren",
+                    betroffene_entitaet=anlage_id
+                )
             
-            for geraet_id in zugehoerige_geraete:
-                if geraet_id not in geraete_ids:
-                    issues.append(ValidationIssue(
-                        kategorie="Referenzfehler",
-                        beschreibung=f"Anlage {anlage_id} referenziert nicht existierendes Gerät {geraet_id}",
-                        fundstellen=self._get_fundstellen([anlage]),
-                        schweregrad="kritisch",
-                        empfehlung=f"Bitte Gerät {geraet_id} prüfen oder Anlage korrigieren",
-                        betroffene_entitaet=anlage_id
-                    ))
+            for geraet_id in fehlende_geraete:
+                yield ValidationIssue(
+                    kategorie=KAT_REFERENZFEHLER,
+                    beschreibung=f"Anlage {anlage_id} referenziert nicht existierendes Gerät {geraet_id}",
+                    fundstellen=self._get_fundstellen([anlage], fundstellen_index),
+                    schweregrad=SCHWERE_KRITISCH,
+                    empfehlung=f"Bitte Gerät {geraet_id} prüfen oder Anlage korrigieren",
+                    betroffene_entitaet=anlage_id
+                )
         
         # Räume-Referenzen prüfen
-        raeume = data.get("raeume", [])
-        for raum in raeume:
+        raum_fehlende_anlagen = self._missing_references(
+            [r.get("zugehoerige_anlagen", []) for r in raeume], anlagen_ids
+        )
+        raum_fehlende_geraete = self._missing_references(
+            [r.get("zugehoerige_geraete", []) for r in raeume], geraete_ids
+        )
+        for raum, fehlende_anlagen, fehlende_geraete in zip(raeume, raum_fehlende_anlagen, raum_fehlende_geraete):
             raum_id = raum.get("id")
-            zugehoerige_anlagen = raum.get("zugehoerige_anlagen", [])
-            zugehoerige_geraete = raum.get("zugehoerige_geraete", [])
             
-            for anlage_id in zugehoerige_anlagen:
-                if anlage_id not in anlagen_ids:
-                    issues.append(ValidationIssue(
-                        kategorie="Referenzfehler",
-                        beschreibung=f"Raum {raum_id} referenziert nicht existierende Anlage {anlage_id}",
-                        fundstellen=self._get_fundstellen([raum]),
-                        schweregrad="kritisch",
-                        empfehlung=f"Bitte Anlage {anlage_id} prüfen oder Raum korrigieren",
-                        betroffene_entitaet=raum_id
-                    ))
+            for anlage_id in fehlende_anlagen:
+                yield ValidationIssue(
+                    kategorie=KAT_REFERENZFEHLER,
+                    beschreibung=f"Raum {raum_id} referenziert nicht existierende Anlage {anlage_id}",
+                    fundstellen=self._get_fundstellen([raum], fundstellen_index),
+                    schweregrad=SCHWERE_KRITISCH,
+                    empfehlung=f"Bitte Anlage {anlage_id} prüfen oder Raum korrigieren",
+                    betroffene_entitaet=raum_id
+                )
             
-            for geraet_id in zugehoerige_geraete:
-                if geraet_id not in geraete_ids:
-                    issues.append(ValidationIssue(
-                        kategorie="Referenzfehler",
-                        beschreibung=f"Raum {raum_id} referenziert nicht existierendes Gerät {geraet_id}",
-                        fundstellen=self._get_fundstellen([raum]),
-                        schweregrad="kritisch",
-                        empfehlung=f"Bitte Gerät {geraet_id} prüfen oder Raum korrigieren",
-                        betroffene_entitaet=raum_id
-                    ))
+            for geraet_id in fehlende_geraete:
+                yield ValidationIssue(
+                    kategorie=KAT_REFERENZFEHLER,
+                    beschreibung=f"Raum {raum_id} referenziert nicht existierendes Gerät {geraet_id}",
+                    fundstellen=self._get_fundstellen([raum], fundstellen_index),
+                    schweregrad=SCHWERE_KRITISCH,
+                    empfehlung=f"Bitte Gerät {geraet_id} prüfen oder Raum korrigieren",
+                    betroffene_entitaet=raum_id
+                )
         
         # Termine-Referenzen prüfen
-        termine = data.get("termine", [])
         for termin in termine:
             termin_id = termin.get("id")
             zugehoerige_leistung = termin.get("zugehoerige_leistung")
             
             if zugehoerige_leistung and zugehoerige_leistung not in leistungen_ids:
-                issues.append(ValidationIssue(
-                    kategorie="Referenzfehler",
+                yield ValidationIssue(
+                    kategorie=KAT_REFERENZFEHLER,
                     beschreibung=f"Termin {termin_id} referenziert nicht existierende Leistung {zugehoerige_leistung}",
-                    fundstellen=self._get_fundstellen([termin]),
-                    schweregrad="warnung",
+                    fundstellen=self._get_fundstellen([termin], fundstellen_index),
+                    schweregrad=SCHWERE_WARNUNG,
                     empfehlung=f"Bitte Leistung {zugehoerige_leistung} prüfen oder Termin korrigieren",
                     betroffene_entitaet=termin_id
-                ))
+                )
+    
+    def _missing_references(self, ref_lists: List[List[Any]], known_ids: set) -> List[List[Any]]:
+        """
+        Liefert je Referenzliste die Einträge, die nicht in known_ids vorkommen
+        Bei großen Projekten mit reinen String-IDs werden alle Referenzen in einem
+        einzigen vektorisierten Abgleich (np.isin) statt einzeln geprüft
+        """
+        flat_refs = [ref for refs in ref_lists for ref in refs]
+        if (
+            len(flat_refs) + len(known_ids) > NUMPY_REFERENCE_THRESHOLD
+            and all(isinstance(ref, str) for ref in flat_refs)
+            and all(isinstance(i, str) for i in known_ids)
+        ):
+            found = np.isin(
+                np.array(flat_refs, dtype=str),
+                np.array(sorted(known_ids), dtype=str)
+            ).tolist()
+        else:
+            found = [ref in known_ids for ref in flat_refs]
         
-        return issues
+        missing = []
+        pos = 0
+        for refs in ref_lists:
+            end = pos + len(refs)
+            missing.append([ref for ref, ok in zip(refs, found[pos:end]) if not ok])
+            pos = end
+        return missing
     
-    def _check_numerical_plausibility(self, data: Dict[str, Any]) -> List[ValidationIssue]:
+    def _check_numerical_plausibility(
+        self,
+        raum_cols: Dict[str, Any],
+        anlagen: List[Dict[str, Any]],
+        geraete: List[Dict[str, Any]],
+        fundstellen_index: Dict[int, Tuple[str, ...]]
+    ) -> Iterator[ValidationIssue]:
         """Prüft numerische Plausibilität (z.B. Flächen > 0, realistische Werte)"""
-        issues = []
-        
         # Raumflächen müssen positiv und realistisch sein
-        for raum in data.get("raeume", []):
-            raum_id = raum.get("id")
-            flaeche = raum.get("flaeche_m2")
-            volumen = raum.get("volumen_m3")
-            hoehe = raum.get("hoehe_m")
+        for idx, raum in enumerate(raum_cols["raeume"]):
+            raum_id = raum_cols["id"][idx]
+            flaeche = raum_cols["flaeche_m2"][idx]
+            volumen = raum_cols["volumen_m3"][idx]
+            hoehe = raum_cols["hoehe_m"][idx]
             
             if flaeche is not None:
                 if flaeche <= 0:
-                    issues.append(ValidationIssue(
-                        kategorie="Plausibilitätsfehler",
+                    yield ValidationIssue(
+                        kategorie=KAT_PLAUSIBILITAET,
                         beschreibung=f"Raum {raum_id} hat ungültige Fläche: {flaeche} m² (muss > 0 sein)",
-                        fundstellen=self._get_fundstellen([raum]),
-                        schweregrad="kritisch",
+                        fundstellen=self._get_fundstellen([raum], fundstellen_index),
+                        schweregrad=SCHWERE_KRITISCH,
                         empfehlung=f"Bitte Fläche für Raum {raum_id} prüfen",
                         betroffene_entitaet=raum_id
-                    ))
+                    )
                 elif flaeche > 10000:  # Unrealistisch große Fläche
-                    issues.append(ValidationIssue(
-                        kategorie="Plausibilitätsfehler",
+                    yield ValidationIssue(
+                        kategorie=KAT_PLAUSIBILITAET,
                         beschreibung=f"Raum {raum_id} hat sehr große Fläche: {flaeche} m² (ungewöhnlich)",
-                        fundstellen=self._get_fundstellen([raum]),
-                        schweregrad="hinweis",
+                        fundstellen=self._get_fundstellen([raum], fundstellen_index),
+                        schweregrad=SCHWERE_HINWEIS,
                         empfehlung=f"Bitte Fläche für Raum {raum_id} überprüfen",
                         betroffene_entitaet=raum_id
-                    ))
+                    )
             
             if volumen is not None and volumen <= 0:
-                issues.append(ValidationIssue(
-                    kategorie="Plausibilitätsfehler",
+                yield ValidationIssue(
+                    kategorie=KAT_PLAUSIBILITAET,
                     beschreibung=f"Raum {raum_id} hat ungültiges Volumen: {volumen} m³ (muss > 0 sein)",
-                    fundstellen=self._get_fundstellen([raum]),
-                    schweregrad="kritisch",
+                    fundstellen=self._get_fundstellen([raum], fundstellen_index),
+                    schweregrad=SCHWERE_KRITISCH,
                     empfehlung=f"Bitte Volumen für Raum {raum_id} prüfen",
                     betroffene_entitaet=raum_id
-                ))
+                )
             
             if hoehe is not None:
                 if hoehe <= 0:
-                    issues.append(ValidationIssue(
-                        kategorie="Plausibilitätsfehler",
+                    yield ValidationIssue(
+                        kategorie=KAT_PLAUSIBILITAET,
                         beschreibung=f"Raum {raum_id} hat ungültige Höhe: {hoehe} m (muss > 0 sein)",
-                        fundstellen=self._get_fundstellen([raum]),
-                        schweregrad="kritisch",
+                        fundstellen=self._get_fundstellen([raum], fundstellen_index),
+                        schweregrad=SCHWERE_KRITISCH,
                         empfehlung=f"Bitte Höhe für Raum {raum_id} prüfen",
                         betroffene_entitaet=raum_id
-                    ))
+                    )
                 elif hoehe > 10:  # Unrealistisch hohe Raumhöhe
-                    issues.append(ValidationIssue(
-                        kategorie="Plausibilitätsfehler",
+                    yield ValidationIssue(
+                        kategorie=KAT_PLAUSIBILITAET,
                         beschreibung=f"Raum {raum_id} hat sehr hohe Raumhöhe: {hoehe} m (ungewöhnlich)",
-                        fundstellen=self._get_fundstellen([raum]),
-                        schweregrad="hinweis",
+                        fundstellen=self._get_fundstellen([raum], fundstellen_index),
+                        schweregrad=SCHWERE_HINWEIS,
                         empfehlung=f"Bitte Höhe für Raum {raum_id} überprüfen",
                         betroffene_entitaet=raum_id
-                    ))
+                    )
         
         # Anlagen-Leistungen müssen positiv und realistisch sein
-        for anlage in data.get("anlagen", []):
+        for anlage in anlagen:
             anlage_id = anlage.get("id")
             leistung_kw = anlage.get("leistung_kw")
             leistung_m3_h = anlage.get("leistung_m3_h")
             
             if leistung_kw is not None:
                 if leistung_kw < 0:
-                    issues.append(ValidationIssue(
-                        kategorie="Plausibilitätsfehler",
+                    yield ValidationIssue(
+                        kategorie=KAT_PLAUSIBILITAET,
                         beschreibung=f"Anlage {anlage_id} hat negative Leistung: {leistung_kw} kW",
-                        fundstellen=self._get_fundstellen([anlage]),
-                        schweregrad="kritisch",
+                        fundstellen=self._get_fundstellen([anlage], fundstellen_index),
+                        schweregrad=SCHWERE_KRITISCH,
                         empfehlung=f"Bitte Leistung für Anlage {anlage_id} prüfen",
                         betroffene_entitaet=anlage_id
-                    ))
+                    )
                 elif leistung_kw > 10000:  # Sehr große Leistung
-                    issues.append(ValidationIssue(
-                        kategorie="Plausibilitätsfehler",
+                    yield ValidationIssue(
+                        kategorie=KAT_PLAUSIBILITAET,
                         beschreibung=f"Anlage {anlage_id} hat sehr große Leistung: {leistung_kw} kW (ungewöhnlich)",
-                        fundstellen=self._get_fundstellen([anlage]),
-                        schweregrad="hinweis",
+                        fundstellen=self._get_fundstellen([anlage], fundstellen_index),
+                        schweregrad=SCHWERE_HINWEIS,
                         empfehlung=f"Bitte Leistung für Anlage {anlage_id} überprüfen",
                         betroffene_entitaet=anlage_id
-                    ))
+                    )
             
             if leistung_m3_h is not None and leistung_m3_h < 0:
-                issues.append(ValidationIssue(
-                    kategorie="Plausibilitätsfehler",
+                yield ValidationIssue(
+                    kategorie=KAT_PLAUSIBILITAET,
                     beschreibung=f"Anlage {anlage_id} hat negativen Volumenstrom: {leistung_m3_h} m³/h",
-                    fundstellen=self._get_fundstellen([anlage]),
-                    schweregrad="kritisch",
+                    fundstellen=self._get_fundstellen([anlage], fundstellen_index),
+                    schweregrad=SCHWERE_KRITISCH,
                     empfehlung=f"Bitte Volumenstrom für Anlage {anlage_id} prüfen",
                     betroffene_entitaet=anlage_id
-                ))
+                )
         
         # Geräte-Leistungen prüfen
-        for geraet in data.get("geraete", []):
+        for geraet in geraete:
             geraet_id = geraet.get("id")
             leistung_kw = geraet.get("leistung_kw")
             
             if leistung_kw is not None and leistung_kw < 0:
-                issues.append(ValidationIssue(
-                    kategorie="Plausibilitätsfehler",
+                yield ValidationIssue(
+                    kategorie=KAT_PLAUSIBILITAET,
                     beschreibung=f"Gerät {geraet_id} hat negative Leistung: {leistung_kw} kW",
-                    fundstellen=self._get_fundstellen([geraet]),
-                    schweregrad="kritisch",
+                    fundstellen=self._get_fundstellen([geraet], fundstellen_index),
+                    schweregrad=SCHWERE_KRITISCH,
                     empfehlung=f"Bitte Leistung für Gerät {geraet_id} prüfen",
                     betroffene_entitaet=geraet_id
-                ))
-        
-        return issues
+                )
     
-    async def _check_offerte_spec(self, data: Dict[str, Any]) -> List[ValidationIssue]:
+    def _check_offerte_spec(
+        self,
+        projekt: Dict[str, Any],
+        raeume: List[Dict[str, Any]],
+        anlagen: List[Dict[str, Any]],
+        fundstellen_index: Dict[int, Tuple[str, ...]]
+    ) -> Iterator[ValidationIssue]:
         """Prüft Abgleich mit YAML-Offertvorgabe"""
-        issues = []
-        
         if not self.offerte_spec:
-            return issues
-        
-        mindestanforderungen = self.offerte_spec.get("mindestanforderungen", {})
+            return
         
         # Projekt-Parameter prüfen
-        projekt = data.get("projekt", {})
-        projekt_felder = mindestanforderungen.get("projekt", {}).get("erforderliche_felder", [])
-        for feld in projekt_felder:
-            if feld not in projekt or not projekt[feld]:
-                issues.append(ValidationIssue(
-                    kategorie="Fehlende Angabe",
+        for feld in self._projekt_pflichtfelder:
+            if not projekt.get(feld):
+                yield ValidationIssue(
+                    kategorie=KAT_FEHLENDE_ANGABE,
                     beschreibung=f"Projekt-Parameter '{feld}' fehlt (erforderlich für Offerte)",
                     fundstellen=[],
-                    schweregrad="kritisch",
+                    schweregrad=SCHWERE_KRITISCH,
                     empfehlung=f"Bitte '{feld}' für das Projekt ergänzen"
-                ))
+                )
         
         # Räume prüfen
-        raeume = data.get("raeume", [])
-        raum_anforderungen = mindestanforderungen.get("raeume", {})
-        min_anzahl = raum_anforderungen.get("min_anzahl", 0)
-        erforderliche_felder = raum_anforderungen.get("erforderliche_felder", [])
-        
+        min_anzahl = self._min_anzahl_raeume
         if len(raeume) < min_anzahl:
-            issues.append(ValidationIssue(
-                kategorie="Fehlende Angabe",
+            yield ValidationIssue(
+                kategorie=KAT_FEHLENDE_ANGABE,
                 beschreibung=f"Mindestens {min_anzahl} Raum/Räume erforderlich, aber nur {len(raeume)} vorhanden",
                 fundstellen=[],
-                schweregrad="kritisch",
+                schweregrad=SCHWERE_KRITISCH,
                 empfehlung=f"Bitte mindestens {min_anzahl} Raum/Räume hinzufügen"
-            ))
+            )
         
-        for raum in raeume:
-            for feld in erforderliche_felder:
-                if feld not in raum or raum[feld] is None:
-                    issues.append(ValidationIssue(
-                        kategorie="Fehlende Angabe",
+        raum_pflichtfelder = self._raum_pflichtfelder
+        for raum in raeume if raum_pflichtfelder else ():
+            for feld in raum_pflichtfelder:
+                # Fehlendes Feld und None werden gleich behandelt
+                if raum.get(feld) is None:
+                    yield ValidationIssue(
+                        kategorie=KAT_FEHLENDE_ANGABE,
                         beschreibung=f"Raum {raum.get('id', 'unbekannt')} hat kein Feld '{feld}' (erforderlich)",
-                        fundstellen=self._get_fundstellen([raum]),
-                        schweregrad="kritisch",
+                        fundstellen=self._get_fundstellen([raum], fundstellen_index),
+                        schweregrad=SCHWERE_KRITISCH,
                         empfehlung=f"Bitte '{feld}' für Raum {raum.get('id')} ergänzen",
                         betroffene_entitaet=raum.get("id")
-                    ))
+                    )
         
         # Anlagen prüfen
-        anlagen = data.get("anlagen", [])
-        anlage_anforderungen = mindestanforderungen.get("anlagen", {})
-        erforderliche_felder_anlage = anlage_anforderungen.get("erforderliche_felder", [])
-        
-        for anlage in anlagen:
-            for feld in erforderliche_felder_anlage:
-                if feld not in anlage or anlage[feld] is None:
-                    issues.append(ValidationIssue(
-                        kategorie="Fehlende Angabe",
+        anlage_pflichtfelder = self._anlage_pflichtfelder
+        for anlage in anlagen if anlage_pflichtfelder else ():
+            for feld in anlage_pflichtfelder:
+                if anlage.get(feld) is None:
+                    yield ValidationIssue(
+                        kategorie=KAT_FEHLENDE_ANGABE,
                         beschreibung=f"Anlage {anlage.get('id', 'unbekannt')} hat kein Feld '{feld}' (erforderlich)",
-                        fundstellen=self._get_fundstellen([anlage]),
-                        schweregrad="warnung",
+                        fundstellen=self._get_fundstellen([anlage], fundstellen_index),
+                        schweregrad=SCHWERE_WARNUNG,
                         empfehlung=f"Bitte '{feld}' für Anlage {anlage.get('id')} ergänzen",
                         betroffene_entitaet=anlage.get("id")
-                    ))
-        
-        return issues
+                    )
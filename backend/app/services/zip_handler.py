@@ -4,11 +4,40 @@ Verarbeitet ZIP-Archive beim Upload und extrahiert enthaltene Dateien
 """
 
 import zipfile
+import asyncio
+import functools
+import io
+import mimetypes
 import os
+import struct
 import tempfile
-from typing import List, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterable, Iterator, List, Tuple, Union
 from pathlib import Path
 import uuid
+from collections import deque
+
+from app.services.file_classifier import FileClassifier
+
+# Optional import - ISA-L entpackt DEFLATE deutlich schneller als zlib
+try:
+    from isal import isal_zlib
+    ISAL_AVAILABLE = True
+except ImportError:
+    ISAL_AVAILABLE = False
+    isal_zlib = None
+
+# MIME-Datenbank einmalig beim Import laden statt beim ersten guess_type()-Aufruf im Upload
+mimetypes.init()
+
+_ARCHIVE_EXTS = frozenset({'.zip', '.tar', '.gz', '.bz2', '.7z', '.rar'})
+
+
+@functools.lru_cache(maxsize=128)
+def _mime_for_ext(ext: str) -> str:
+    """MIME-Type zu einer Dateiendung (inkl. Punkt); hängt für unsere Dateien nur von der Endung ab"""
+    return mimetypes.guess_type("x" + ext)[0] or "application/octet-stream"
 
 
 class ZIPHandler:
@@ -16,103 +45,264 @@ class ZIPHandler:
     
     MAX_EXTRACT_SIZE = 500 * 1024 * 1024  # 500 MB Gesamtgröße
     MAX_FILE_COUNT = 1000  # Maximale Anzahl Dateien im Archiv
+    SPOOL_THRESHOLD = 10 * 1024 * 1024  # Größere Dateien werden beim Entpacken auf die Platte ausgelagert
+    SPOOL_CHUNK_SIZE = 1024 * 1024
+    MAX_WORKERS = min(8, os.cpu_count() or 1)  # Threads für paralleles Entpacken
     
     def __init__(self):
-        self.extracted_files: List[Tuple[bytes, str]] = []  # (content, filename)
+        # (content, filename); content ist bytes oder bei großen Dateien der Pfad einer temporären Datei
+        self.extracted_files: List[Tuple[Union[bytes, Path], str]] = []
     
-    def extract_archive(self, zip_content: bytes, max_depth: int = 3) -> List[Tuple[bytes, str]]:
+    def extract_archive(
+        self,
+        zip_content: Union[bytes, BinaryIO],
+        max_depth: int = 3
+    ) -> List[Tuple[Union[bytes, Path], str]]:
         """
         Extrahiert Dateien aus einem ZIP-Archiv
-        Unterstützt rekursive Verarbeitung verschachtelter Archive
+        Unterstützt die Verarbeitung verschachtelter Archive
         
         Args:
-            zip_content: Bytes des ZIP-Archivs
+            zip_content: Bytes des ZIP-Archivs oder ein seekbares Datei-Objekt
+                (z.B. die SpooledTemporaryFile eines Uploads)
             max_depth: Maximale Verschachtelungstiefe (verhindert Zip-Bomben)
         
         Returns:
-            Liste von Tupeln (Dateiinhalt, Dateiname)
+            Liste von Tupeln (Dateiinhalt, Dateiname). Dateien ab SPOOL_THRESHOLD werden
+            blockweise in eine temporäre Datei entpackt und als Path geliefert; der Aufrufer
+            entfernt sie mit cleanup_spooled()
         """
         if max_depth <= 0:
             raise ValueError("Maximale Verschachtelungstiefe erreicht")
         
         self.extracted_files = []
+        try:
+            self._extract_entries(zip_content, max_depth)
+        except Exception:
+            # Bereits ausgelagerte Dateien nicht liegen lassen
+            self.cleanup_spooled(content for content, _ in self.extracted_files)
+            self.extracted_files = []
+            raise
+        
+        return self.extracted_files
+    
+    def _extract_entries(self, zip_content: Union[bytes, BinaryIO], max_depth: int) -> None:
+        """
+        Entpackt das Archiv samt verschachtelter Archive nach self.extracted_files
+        Die Archive werden iterativ über eine Warteschlange abgearbeitet; Gesamtgröße und
+        Dateianzahl gelten dabei für alle Ebenen gemeinsam. Die Budget-Prüfung läuft vorab
+        im aufrufenden Thread, das Entpacken der einzelnen Dateien im Thread Pool
+        """
         total_size = 0
         file_count = 0
+        queue = deque([(zip_content, max_depth)])
         
-        try:
-            with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-                tmp_file.write(zip_content)
-                tmp_path = tmp_file.name
-            
-            with zipfile.ZipFile(tmp_path, 'r') as zip_ref:
-                # Prüfe auf Zip-Bomben (zu viele Dateien oder zu groß)
-                file_list = zip_ref.namelist()
-                if len(file_list) > self.MAX_FILE_COUNT:
-                    raise ValueError(f"Zu viele Dateien im Archiv: {len(file_list)} > {self.MAX_FILE_COUNT}")
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            while queue:
+                archive, depth = queue.popleft()
+                try:
+                    zip_ref = zipfile.ZipFile(self._as_stream(archive), 'r')
+                except Exception as e:
+                    # Nur das äußere Archiv muss gültig sein
+                    if depth == max_depth:
+                        raise
+                    print(f"Fehler beim Extrahieren verschachtelten Archivs: {e}")
+                    continue
                 
-                # Extrahiere jede Datei
-                for file_info in zip_ref.infolist():
-                    # Überspringe Verzeichnisse
-                    if file_info.is_dir():
-                        continue
+                with zip_ref:
+                    # Prüfe auf Zip-Bomben (zu viele Dateien oder zu groß)
+                    infos = zip_ref.infolist()
+                    if len(infos) > self.MAX_FILE_COUNT:
+                        raise ValueError(f"Zu viele Dateien im Archiv: {len(infos)} > {self.MAX_FILE_COUNT}")
                     
-                    # Prüfe Gesamtgröße
-                    total_size += file_info.file_size
-                    if total_size > self.MAX_EXTRACT_SIZE:
-                        raise ValueError(f"Archiv zu groß: {total_size} > {self.MAX_EXTRACT_SIZE}")
+                    jobs = []
+                    for file_info in infos:
+                        # Überspringe Verzeichnisse
+                        if file_info.is_dir():
+                            continue
+                        
+                        # Prüfe Gesamtgröße
+                        total_size += file_info.file_size
+                        if total_size > self.MAX_EXTRACT_SIZE:
+                            raise ValueError(f"Archiv zu groß: {total_size} > {self.MAX_EXTRACT_SIZE}")
+                        
+                        file_count += 1
+                        if file_count > self.MAX_FILE_COUNT:
+                            raise ValueError(f"Zu viele Dateien: {file_count} > {self.MAX_FILE_COUNT}")
+                        
+                        filename = os.path.basename(file_info.filename)
+                        is_archive = self._is_archive(filename)
+                        # Verschachtelte Archive nur einreihen, solange die Tiefe es erlaubt
+                        if is_archive and depth <= 1:
+                            continue
+                        jobs.append((file_info, filename, is_archive))
                     
-                    file_count += 1
-                    if file_count > self.MAX_FILE_COUNT:
-                        raise ValueError(f"Zu viele Dateien: {file_count} > {self.MAX_FILE_COUNT}")
+                    # Extrahiere die Dateien; Reihenfolge der Ergebnisse entspricht jobs
+                    if len(jobs) > 1 and isinstance(archive, (bytes, bytearray, memoryview)):
+                        results = self._extract_parallel(executor, archive, jobs)
+                    else:
+                        results = [self._extract_member(zip_ref, *job) for job in jobs]
                     
-                    # Extrahiere Datei
-                    try:
-                        file_content = zip_ref.read(file_info.filename)
-                        filename = os.path.basename(file_info.filename)
-                        
-                        # Prüfe, ob es ein verschachteltes Archiv ist
-                        if self._is_archive(filename):
-                            # Rekursiv verarbeiten
-                            nested_files = self._extract_nested_archive(file_content, max_depth - 1)
-                            self.extracted_files.extend(nested_files)
+                    for (_, filename, is_archive), content in zip(jobs, results):
+                        if content is None:
+                            continue
+                        if is_archive:
+                            queue.append((content, depth - 1))
                         else:
-                            # Normale Datei hinzufügen
-                            self.extracted_files.append((file_content, filename))
-                    
-                    except Exception as e:
-                        # Fehler bei einer Datei blockiert nicht den Rest
-                        print(f"Fehler beim Extrahieren von {file_info.filename}: {e}")
-                        continue
-            
-            return self.extracted_files
+                            self.extracted_files.append((content, filename))
+    
+    def _extract_parallel(
+        self,
+        executor: ThreadPoolExecutor,
+        archive: bytes,
+        jobs: List[Tuple[zipfile.ZipInfo, str, bool]]
+    ) -> List[Union[bytes, Path, None]]:
+        """
+        Entpackt die Dateien eines Archivs parallel
+        ZipFile ist nicht thread-sicher, daher öffnet jeder Worker-Thread ein eigenes Handle
+        """
+        local = threading.local()
+        handles = []
+        
+        def work(job):
+            zip_ref = getattr(local, "zip_ref", None)
+            if zip_ref is None:
+                zip_ref = local.zip_ref = zipfile.ZipFile(io.BytesIO(archive), 'r')
+                handles.append(zip_ref)
+            return self._extract_member(zip_ref, *job)
         
+        try:
+            return list(executor.map(work, jobs))
         finally:
-            # Temporäre Datei löschen
+            for zip_ref in handles:
+                zip_ref.close()
+    
+    def _extract_member(
+        self,
+        zip_ref: zipfile.ZipFile,
+        file_info: zipfile.ZipInfo,
+        filename: str,
+        is_archive: bool
+    ) -> Union[bytes, Path, None]:
+        """Entpackt eine einzelne Datei; None, wenn sie nicht gelesen werden konnte"""
+        try:
+            if not is_archive and file_info.file_size >= self.SPOOL_THRESHOLD:
+                # Große Datei nicht im Speicher halten
+                return self._spool_to_disk(zip_ref, file_info, filename)
+            return self._read_member(zip_ref, file_info)
+        except Exception as e:
+            # Fehler bei einer Datei blockiert nicht den Rest
+            print(f"Fehler beim Extrahieren von {file_info.filename}: {e}")
+            return None
+    
+    def _spool_to_disk(self, zip_ref: zipfile.ZipFile, file_info: zipfile.ZipInfo, filename: str) -> Path:
+        """Entpackt eine Datei blockweise in eine temporäre Datei und liefert deren Pfad"""
+        suffix = os.path.splitext(filename)[1]
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as dst:
+            spooled_path = Path(dst.name)
             try:
-                os.unlink(tmp_path)
-            except:
-                pass
+                for chunk in self._iter_member(zip_ref, file_info):
+                    dst.write(chunk)
+            except Exception:
+                dst.close()
+                spooled_path.unlink(missing_ok=True)
+                raise
+        return spooled_path
     
-    def _is_archive(self, filename: str) -> bool:
-        """Prüft, ob eine Datei ein Archiv ist"""
-        archive_extensions = ['.zip', '.tar', '.gz', '.bz2', '.7z', '.rar']
-        ext = Path(filename).suffix.lower()
-        return ext in archive_extensions
+    def _read_member(self, zip_ref: zipfile.ZipFile, file_info: zipfile.ZipInfo) -> bytes:
+        """Entpackt eine Datei vollständig in den Speicher"""
+        return b"".join(self._iter_member(zip_ref, file_info))
     
-    def _extract_nested_archive(self, archive_content: bytes, max_depth: int) -> List[Tuple[bytes, str]]:
+    def _iter_member(self, zip_ref: zipfile.ZipFile, file_info: zipfile.ZipInfo) -> Iterator[bytes]:
         """
-        Extrahiert verschachteltes Archiv rekursiv
-        Aktuell nur ZIP unterstützt, andere Formate werden ignoriert
+        Liefert den entpackten Inhalt einer Datei blockweise
+        DEFLATE-Einträge werden mit ISA-L entpackt, falls installiert; sonst über zipfile
         """
-        if max_depth <= 0:
-            return []
+        if not ISAL_AVAILABLE or file_info.compress_type != zipfile.ZIP_DEFLATED or file_info.flag_bits & 0x1:
+            with zip_ref.open(file_info) as src:
+                while chunk := src.read(self.SPOOL_CHUNK_SIZE):
+                    yield chunk
+            return
         
-        try:
-            handler = ZIPHandler()
-            return handler.extract_archive(archive_content, max_depth)
-        except Exception as e:
-            print(f"Fehler beim Extrahieren verschachtelten Archivs: {e}")
-            return []
+        # Lokalen Header prüfen wie ZipFile.open (Signatur, Dateiname), dann die Rohdaten direkt entpacken
+        fp = zip_ref.fp
+        fp.seek(file_info.header_offset)
+        header = fp.read(30)
+        if len(header) != 30 or header[:4] != b"PK\x03\x04":
+            raise zipfile.BadZipFile(f"Ungültiger lokaler Header: {file_info.filename}")
+        (flag_bits,) = struct.unpack_from("<H", header, 6)
+        name_length, extra_length = struct.unpack_from("<HH", header, 26)
+        local_name = fp.read(name_length)
+        if flag_bits & 0x800:
+            local_name = local_name.decode("utf-8")
+        else:
+            local_name = local_name.decode(getattr(zip_ref, "metadata_encoding", None) or "cp437")
+        if local_name != file_info.orig_filename:
+            raise zipfile.BadZipFile(
+                f"Dateiname im Verzeichnis {file_info.orig_filename!r} und im lokalen Header {local_name!r} unterschiedlich"
+            )
+        fp.seek(extra_length, os.SEEK_CUR)
+        
+        inflater = isal_zlib.decompressobj(-15)
+        remaining = file_info.compress_size
+        written = 0
+        crc = 0
+        pending = b""
+        while True:
+            if not pending:
+                if not remaining:
+                    break
+                pending = fp.read(min(remaining, self.SPOOL_CHUNK_SIZE))
+                if not pending:
+                    raise zipfile.BadZipFile(f"Unerwartetes Dateiende: {file_info.filename}")
+                remaining -= len(pending)
+            # Ausgabe pro Schritt begrenzen, damit stark komprimierte Daten den Speicher nicht sprengen
+            chunk = inflater.decompress(pending, self.SPOOL_CHUNK_SIZE)
+            pending = inflater.unconsumed_tail
+            written += len(chunk)
+            if written > file_info.file_size:
+                raise zipfile.BadZipFile(f"Datei größer als angegeben: {file_info.filename}")
+            crc = isal_zlib.crc32(chunk, crc)
+            yield chunk
+        
+        chunk = inflater.flush()
+        written += len(chunk)
+        crc = isal_zlib.crc32(chunk, crc)
+        if written != file_info.file_size or crc != file_info.CRC:
+            raise zipfile.BadZipFile(f"Fehlerhafte Datei im Archiv: {file_info.filename}")
+        if chunk:
+            yield chunk
+    
+    @staticmethod
+    def cleanup_spooled(contents: Iterable[Union[bytes, Path]]) -> None:
+        """Löscht die beim Entpacken ausgelagerten temporären Dateien"""
+        for content in contents:
+            if isinstance(content, Path):
+                try:
+                    content.unlink(missing_ok=True)
+                except OSError:
+                    pass
+    
+    @staticmethod
+    def _as_stream(zip_content: Union[bytes, BinaryIO]) -> BinaryIO:
+        """Liefert ein Datei-Objekt für zipfile, ohne das Archiv auf die Platte zu schreiben"""
+        if isinstance(zip_content, (bytes, bytearray, memoryview)):
+            return io.BytesIO(zip_content)
+        zip_content.seek(0)
+        return zip_content
+    
+    @staticmethod
+    def _file_ext(filename: str) -> str:
+        """Dateiendung inkl. Punkt in Kleinbuchstaben, wie os.path.splitext (ohne Tupel-Umweg)"""
+        stem, dot, ext = filename.rpartition('.')
+        # Führende Punkte (".bashrc") gelten wie bei splitext nicht als Endung
+        if not dot or not stem.strip('.'):
+            return ""
+        return f".{ext.lower()}"
+    
+    def _is_archive(self, filename: str) -> bool:
+        """Prüft, ob eine Datei ein Archiv ist"""
+        return self._file_ext(filename) in _ARCHIVE_EXTS
     
     async def extract_and_list_files(self, zip_content: bytes, project_id: int) -> List[dict]:
         """
@@ -120,54 +310,46 @@ class ZIPHandler:
         Für Verwendung im Upload-Endpoint
         
         Returns:
-            Liste von Dicts mit: content, filename, file_type, mime_type, size
+            Liste von Dicts mit: content (bytes oder Path, siehe extract_archive),
+            filename, file_type, mime_type, size
         """
+        # Entpacken und Auflisten in Thread Pool verschieben, um Event Loop nicht zu blockieren
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._list_files, zip_content)
+    
+    def _list_files(self, zip_content: Union[bytes, BinaryIO]) -> List[dict]:
+        """Synchroner Teil von extract_and_list_files (läuft im Thread Pool)"""
         extracted = self.extract_archive(zip_content)
         
-        from app.services.file_classifier import FileClassifier
-        classifier = FileClassifier()
+        detect_file_type = FileClassifier.detect_file_type
         
         file_list = []
         for content, filename in extracted:
-            file_ext = os.path.splitext(filename)[1].lower()
-            file_type = classifier.detect_file_type(file_ext, None)
-            
-            # MIME-Type schätzen
-            import mimetypes
-            mime_type, _ = mimetypes.guess_type(filename)
+            file_ext = self._file_ext(filename)
+            file_type = detect_file_type(file_ext, None)
             
             file_list.append({
                 "content": content,
                 "filename": filename,
                 "file_type": file_type,
-                "mime_type": mime_type or "application/octet-stream",
-                "size": len(content)
+                # MIME-Type schätzen
+                "mime_type": _mime_for_ext(file_ext),
+                "size": content.stat().st_size if isinstance(content, Path) else len(content)
             })
         
         return file_list
     
-    def get_file_info(self, zip_content: bytes) -> dict:
+    def get_file_info(self, zip_content: Union[bytes, BinaryIO]) -> dict:
         """
         Gibt Informationen über den Inhalt eines ZIP-Archivs zurück
         ohne es vollständig zu extrahieren
         """
-        try:
-            with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-                tmp_file.write(zip_content)
-                tmp_path = tmp_file.name
+        with zipfile.ZipFile(self._as_stream(zip_content), 'r') as zip_ref:
+            # Ein Durchlauf über die Einträge des zentralen Verzeichnisses
+            infos = [i for i in zip_ref.infolist() if not i.is_dir()]
             
-            with zipfile.ZipFile(tmp_path, 'r') as zip_ref:
-                file_list = zip_ref.namelist()
-                total_size = sum(zip_ref.getinfo(f).file_size for f in file_list if not zip_ref.getinfo(f).is_dir())
-                
-                return {
-                    "file_count": len([f for f in file_list if not zip_ref.getinfo(f).is_dir()]),
-                    "total_size": total_size,
-                    "files": [f for f in file_list if not zip_ref.getinfo(f).is_dir()]
-                }
-        
-        finally:
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
+            return {
+                "file_count": len(infos),
+                "total_size": sum(i.file_size for i in infos),
+                "files": [i.filename for i in infos]
+            }
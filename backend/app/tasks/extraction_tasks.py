@@ -3,29 +3,42 @@ Celery-Tasks für Datenextraktion
 Führt rechenintensive Parsing-Operationen asynchron aus
 """
 
-from celery import Task
-from sqlalchemy.orm import Session
+from celery import Task, group
+from celery.signals import worker_process_init
+from sqlalchemy import and_
+from sqlalchemy.orm import Session, scoped_session
 from app.celery_app import celery_app
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, engine
 from app.models.project import ProjectFile, ProjectData, Project
 from app.services.extraction_service import ExtractionService
 from app.services.storage import StorageService
 import traceback
 
 
+# Session-Registry des Worker-Prozesses; remove() gibt die Verbindung an den Pool zurück
+WorkerSession = scoped_session(SessionLocal)
+
+
+@worker_process_init.connect
+def _init_worker_db(**kwargs):
+    """Verwirft die vom Hauptprozess geerbten Pool-Verbindungen, bevor der Worker sie nutzt"""
+    engine.dispose(close=False)
+    WorkerSession.remove()
+
+
 class DatabaseTask(Task):
     """Base-Task mit DB-Session-Management"""
     
     _db: Session = None
     
     def before_start(self, task_id, args, kwargs):
-        """Erstellt DB-Session vor Task-Start"""
-        self._db = SessionLocal()
+        """Holt die DB-Session des Worker-Prozesses vor Task-Start"""
+        self._db = WorkerSession()
     
     def after_return(self, *args, **kwargs):
-        """Schließt DB-Session nach Task-Ende"""
+        """Gibt die DB-Session nach Task-Ende zurück"""
         if self._db:
-            self._db.close()
+            WorkerSession.remove()
             self._db = None
     
     def on_failure(self, exc, task_id, args, kwargs, einfo):
@@ -44,7 +57,7 @@ class DatabaseTask(Task):
             except Exception:
                 self._db.rollback()
             finally:
-                self._db.close()
+                WorkerSession.remove()
                 self._db = None
 
 
@@ -53,7 +66,8 @@ class DatabaseTask(Task):
     bind=True,
     name="app.tasks.extraction_tasks.extract_file",
     max_retries=3,
-    default_retry_delay=60  # 1 Minute zwischen Retries
+    default_retry_delay=60,  # 1 Minute zwischen Retries
+    acks_late=True  # Erst nach Abschluss bestätigen, lange Extraktionen blockieren keine freien Worker
 )
 def extract_file(self, file_id: int):
     """
@@ -67,22 +81,37 @@ def extract_file(self, file_id: int):
         db = SessionLocal()
     
     try:
-        # Datei aus DB laden
-        file_obj = db.query(ProjectFile).filter(ProjectFile.id == file_id).first()
-        if not file_obj:
+        # Datei, Projekt und aktives Datenmodell in einer Abfrage laden
+        # (Outer Joins, damit fehlendes Projekt/Datenmodell unterscheidbar bleibt).
+        # Die Datei-Zeile bleibt bis zum Commit gesperrt: ein doppelt eingereihter Task
+        # wartet hier und sieht danach processed = True
+        row = db.query(ProjectFile, Project, ProjectData).outerjoin(
+            Project, Project.id == ProjectFile.project_id
+        ).outerjoin(
+            ProjectData, and_(
+                ProjectData.project_id == Project.id,
+                ProjectData.is_active == True
+            )
+        ).filter(ProjectFile.id == file_id).with_for_update(of=ProjectFile).first()
+        
+        if not row:
             raise ValueError(f"Datei mit ID {file_id} nicht gefunden")
         
-        # Projekt laden
-        project = db.query(Project).filter(Project.id == file_obj.project_id).first()
+        file_obj, project, current_data = row
+        
+        # Doppelt eingereihte Datei nicht ein zweites Mal ins Datenmodell mergen
+        # (unter der Zeilensperre geprüft)
+        if file_obj.processed:
+            db.rollback()  # Sperre freigeben
+            return {
+                "success": True,
+                "file_id": file_id,
+                "skipped": True
+            }
+        
         if not project:
             raise ValueError(f"Projekt mit ID {file_obj.project_id} nicht gefunden")
         
-        # Aktuelles Datenmodell laden
-        current_data = db.query(ProjectData).filter(
-            ProjectData.project_id == project.id,
-            ProjectData.is_active == True
-        ).first()
-        
         if not current_data:
             raise ValueError("Kein aktives Datenmodell für dieses Projekt gefunden")
         
@@ -90,9 +119,9 @@ def extract_file(self, file_id: int):
         extraction_service = ExtractionService(db)
         extracted_data = extraction_service.extract_file(file_obj)
         
-        # Daten ins JSON-Modell integrieren
-        updated_data = extraction_service.merge_extracted_data(
-            current_data.data_json.copy(),
+        # Daten ins JSON-Modell integrieren (liefert ein neues Modell, keine Kopie nötig)
+        updated_data, _ = extraction_service.merge_extracted_data(
+            current_data.data_json,
             extracted_data,
             file_obj
         )
@@ -125,17 +154,23 @@ def extract_file(self, file_id: int):
         }
     
     except Exception as exc:
+        # Retry bei bestimmten Fehlern; dafür reicht die Fehlermeldung ohne Traceback
+        retryable = isinstance(exc, (ConnectionError, TimeoutError))
+        if retryable:
+            error_text = str(exc)
+        else:
+            error_text = f"{str(exc)}\n{traceback.format_exc()}"
+        
         # Fehler in Datenbank speichern
         try:
             file_obj = db.query(ProjectFile).filter(ProjectFile.id == file_id).first()
             if file_obj:
-                file_obj.processing_error = f"{str(exc)}\n{traceback.format_exc()}"
+                file_obj.processing_error = error_text
                 db.commit()
         except Exception:
             db.rollback()
         
-        # Retry bei bestimmten Fehlern
-        if isinstance(exc, (ConnectionError, TimeoutError)):
+        if retryable:
             raise self.retry(exc=exc)
         
         raise exc
@@ -164,35 +199,42 @@ def extract_project_files(self, project_id: int, file_ids: list[int] | None = No
         db = SessionLocal()
     
     try:
-        # Dateien zum Verarbeiten finden
+        # Dateien zum Verarbeiten finden und für die Dauer des Einreihens sperren; Dateien, die ein
+        # paralleler Aufruf gerade einreiht, werden übersprungen. Spätere Aufrufe können noch nicht
+        # verarbeitete Dateien erneut einreihen - extract_file prüft processed unter einer Zeilensperre,
+        # sodass doppelte Tasks nacheinander laufen und der zweite übersprungen wird
+        query = db.query(ProjectFile).filter(
+            ProjectFile.project_id == project_id,
+            ProjectFile.processed == False
+        )
         if file_ids:
-            files_to_process = db.query(ProjectFile).filter(
-                ProjectFile.id.in_(file_ids),
-                ProjectFile.project_id == project_id,
-                ProjectFile.processed == False
-            ).all()
-        else:
-            files_to_process = db.query(ProjectFile).filter(
-                ProjectFile.project_id == project_id,
-                ProjectFile.processed == False
-            ).all()
+            query = query.filter(ProjectFile.id.in_(file_ids))
+        files_to_process = query.with_for_update(skip_locked=True).all()
         
         results = []
-        for file_obj in files_to_process:
+        if files_to_process:
             try:
-                # Einzelne Datei extrahieren
-                result = extract_file.delay(file_obj.id)
-                results.append({
-                    "file_id": file_obj.id,
-                    "task_id": result.id,
-                    "status": "queued"
-                })
+                # Alle Einzel-Extraktionen in einem Aufruf an den Broker übergeben
+                job = group(extract_file.s(file_obj.id) for file_obj in files_to_process)
+                group_result = job.apply_async()
+                for file_obj, result in zip(files_to_process, group_result.children):
+                    results.append({
+                        "file_id": file_obj.id,
+                        "task_id": result.id,
+                        "status": "queued"
+                    })
             except Exception as e:
-                results.append({
-                    "file_id": file_obj.id,
-                    "status": "error",
-                    "error": str(e)
-                })
+                results = [
+                    {
+                        "file_id": file_obj.id,
+                        "status": "error",
+                        "error": str(e)
+                    }
+                    for file_obj in files_to_process
+                ]
+        
+        # Sperren erst nach dem Einreihen freigeben (kein dauerhafter "eingereiht"-Status)
+        db.commit()
         
         return {
             "success": True,
@@ -22,29 +22,31 @@ if file:
     print(f"  Use Local Storage: {storage.use_local_storage}")
     print(f"  Local Storage Path: {storage.local_storage_path}")
     
-    # Versuche verschiedene Pfade
-    possible_paths = [
-        os.path.join(storage.local_storage_path, file.file_path),
-        os.path.join("uploads", file.file_path),
-    ]
+    # Versuche verschiedene Pfade (jeweils unter beiden Ablage-Wurzeln)
+    roots = (storage.local_storage_path, "uploads")
+    relative_paths = [file.file_path]
     
     if file.file_path.startswith("projects/"):
         parts = file.file_path.split("/")
         if len(parts) >= 2:
             project_id = parts[1]
             filename = "/".join(parts[2:]) if len(parts) > 2 else parts[1]
-            possible_paths.append(os.path.join(storage.local_storage_path, f"project_{project_id}", filename))
-            possible_paths.append(os.path.join("uploads", f"project_{project_id}", filename))
+            relative_paths.append(os.path.join(f"project_{project_id}", filename))
+    
+    possible_paths = [os.path.join(root, rel) for rel in relative_paths for root in roots]
     
     print(f"\nChecking possible paths:")
     for path in possible_paths:
-        exists = os.path.exists(path)
-        print(f"  {path}: {'EXISTS' if exists else 'NOT FOUND'}")
-        if exists:
-            actual_size = os.path.getsize(path)
-            print(f"    Size: {actual_size} bytes ({actual_size / 1024 / 1024:.2f} MB)")
-            if file.file_size and actual_size != file.file_size:
-                print(f"    WARNING: Size mismatch! Expected: {file.file_size}, Actual: {actual_size}")
+        # Ein stat() pro Kandidat statt exists() + getsize()
+        try:
+            actual_size = os.stat(path).st_size
+        except OSError:
+            print(f"  {path}: NOT FOUND")
+            continue
+        print(f"  {path}: EXISTS")
+        print(f"    Size: {actual_size} bytes ({actual_size / 1024 / 1024:.2f} MB)")
+        if file.file_size and actual_size != file.file_size:
+            print(f"    WARNING: Size mismatch! Expected: {file.file_size}, Actual: {actual_size}")
 else:
     print("File not found!")
 
@@ -5,10 +5,18 @@ Haupt-Einstiegspunkt der Anwendung
 
 import json
 import os
+import queue
+import socket
+import threading
 import traceback
 import time
 
+_dumps = json.dumps
+
 # #region agent log
+# Debug-Logging nur mit DEBUG_LOG_PATH und DEBUG_LOG_ENABLED=1; sonst entfällt es vollständig
+# (kein Writer-Thread, keine Request-Middleware)
+_DEBUG_LOG = os.environ.get("DEBUG_LOG_PATH") is not None and os.environ.get("DEBUG_LOG_ENABLED") == "1"
 log_path = os.environ.get("DEBUG_LOG_PATH", os.path.join(os.path.dirname(__file__), "data", "debug.log"))
 def write_log(message, location, hypothesis_id, data=None):
     try:
@@ -16,48 +24,93 @@ def write_log(message, location, hypothesis_id, data=None):
         if not os.path.exists(log_dir):
             os.makedirs(log_dir, exist_ok=True)
         with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"sessionId":"debug-session","runId":"startup","hypothesisId":hypothesis_id,"location":location,"message":message,"data":data or {},"timestamp":int(time.time()*1000)})+"\n")
+            f.write(_dumps({"sessionId":"debug-session","runId":"startup","hypothesisId":hypothesis_id,"location":location,"message":message,"data":data or {},"timestamp":int(time.time()*1000)})+"\n")
             f.flush()
     except Exception as e:
         print(f"Log write failed: {e}")
-        import traceback
         print(traceback.format_exc())
 
-try:
+if _DEBUG_LOG:
     write_log("Starting imports", "main.py:14", "A,B,C,D,E")
-except Exception as e:
-    print(f"Failed to write initial log: {e}")
-    import traceback
-    print(traceback.format_exc())
+
+# Request-Logs laufen über eine Queue und werden von einem Hintergrund-Thread geschrieben,
+# damit kein Request auf Datei-I/O wartet
+# Feste Felder einmal vorkodiert; pro Request werden nur message, data und timestamp angehängt
+_REQUEST_LOG_PREFIX = '{"sessionId":"debug-session","runId":"request","hypothesisId":"REQUEST","location":"main.py:middleware","message":'
+_log_q: "queue.Queue[str]" = queue.Queue(maxsize=10000)
+
+def _log_writer():
+    """Schreibt die Zeilen aus _log_q gebündelt über ein einziges Datei-Handle"""
+    try:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, 'a', encoding='utf-8') as f:
+            while True:
+                lines = [_log_q.get()]
+                # Alles mitnehmen, was inzwischen aufgelaufen ist
+                while True:
+                    try:
+                        lines.append(_log_q.get_nowait())
+                    except queue.Empty:
+                        break
+                f.write("".join(lines))
+                f.flush()
+    except Exception as e:
+        print(f"Log writer failed: {e}")
+
+def _json_str(value):
+    """JSON-String-Literal; ohne Sonderzeichen (Normalfall bei Methode/Pfad) ohne Encoder"""
+    if value.isascii() and value.isprintable() and '"' not in value and '\\' not in value:
+        return f'"{value}"'
+    return _dumps(value)
+
+def _log_request(message, data):
+    """
+    Reiht eine Request-Logzeile ein; verwirft sie, wenn die Queue voll ist
+    message ist ein fester ASCII-Text, data ein bereits kodiertes JSON-Objekt
+    """
+    try:
+        _log_q.put_nowait(f'{_REQUEST_LOG_PREFIX}"{message}","data":{data},"timestamp":{int(time.time()*1000)}}}\n')
+    except queue.Full:
+        pass
+
+if _DEBUG_LOG:
+    threading.Thread(target=_log_writer, name="debug-log-writer", daemon=True).start()
 # #endregion
 
 try:
-    write_log("Importing FastAPI", "main.py:fastapi_import", "ALL")
+    if _DEBUG_LOG:
+        write_log("Importing FastAPI", "main.py:fastapi_import", "ALL")
     from fastapi import FastAPI, Request
     from fastapi.middleware.cors import CORSMiddleware
     from fastapi.responses import JSONResponse
     from fastapi.staticfiles import StaticFiles
-    write_log("FastAPI imported", "main.py:fastapi_import", "ALL")
+    if _DEBUG_LOG:
+        write_log("FastAPI imported", "main.py:fastapi_import", "ALL")
 except Exception as e:
-    write_log("FastAPI import failed", "main.py:fastapi_import", "ALL", {"error":str(e),"traceback":traceback.format_exc()[:500]})
+    if _DEBUG_LOG:
+        write_log("FastAPI import failed", "main.py:fastapi_import", "ALL", {"error":str(e),"traceback":traceback.format_exc()[:500]})
     raise
 
 try:
-    write_log("Importing config", "main.py:config_import", "B")
+    if _DEBUG_LOG:
+        write_log("Importing config", "main.py:config_import", "B")
     from app.core.config import settings
-    write_log("Config imported successfully", "main.py:config_import", "B", {"database_url":settings.DATABASE_URL[:50] if hasattr(settings,'DATABASE_URL') else 'N/A'})
+    if _DEBUG_LOG:
+        write_log("Config imported successfully", "main.py:config_import", "B", {"database_url":settings.DATABASE_URL[:50] if hasattr(settings,'DATABASE_URL') else 'N/A'})
 except Exception as e:
-    error_details = traceback.format_exc()
-    write_log("Config import failed", "main.py:config_import", "B", {"error_type":type(e).__name__,"error_msg":str(e)[:200],"traceback":error_details[:1000]})
+    if _DEBUG_LOG:
+        write_log("Config import failed", "main.py:config_import", "B", {"error_type":type(e).__name__,"error_msg":str(e)[:200],"traceback":traceback.format_exc()[:1000]})
     raise
 
 try:
-    write_log("Importing api_router", "main.py:api_router_import", "A,D")
+    if _DEBUG_LOG:
+        write_log("Importing api_router", "main.py:api_router_import", "A,D")
     from app.api.v1 import api_router
-    write_log("API router imported successfully", "main.py:api_router_import", "A,D")
+    if _DEBUG_LOG:
+        write_log("API router imported successfully", "main.py:api_router_import", "A,D")
 except Exception as e:
-    error_details = traceback.format_exc()
-    write_log("API router import failed", "main.py:api_router_import", "A,D", {"error_type":type(e).__name__,"error_msg":str(e)[:200],"traceback":error_details[:1000]})
+    if _DEBUG_LOG:
+        write_log("API router import failed", "main.py:api_router_import", "A,D", {"error_type":type(e).__name__,"error_msg":str(e)[:200],"traceback":traceback.format_exc()[:1000]})
     raise
 
 app = FastAPI(
@@ -68,34 +121,20 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Request Logging Middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    # #region agent log
-    try:
-        os.makedirs(os.path.dirname(log_path), exist_ok=True)
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"sessionId":"debug-session","runId":"request","hypothesisId":"REQUEST","location":"main.py:middleware","message":"Request received","data":{"method":request.method,"url":str(request.url),"path":request.url.path},"timestamp":int(time.time()*1000)})+"\n")
-    except: pass
-    # #endregion
-    try:
-        response = await call_next(request)
-        # #region agent log
-        try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"request","hypothesisId":"REQUEST","location":"main.py:middleware","message":"Request completed","data":{"method":request.method,"path":request.url.path,"status_code":response.status_code},"timestamp":int(time.time()*1000)})+"\n")
-        except: pass
-        # #endregion
-        return response
-    except Exception as e:
-        # #region agent log
+# Request Logging Middleware (nur registriert, wenn Debug-Logging aktiv ist)
+# #region agent log
+if _DEBUG_LOG:
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        _log_request("Request received", f'{{"method":{_json_str(request.method)},"url":{_json_str(str(request.url))},"path":{_json_str(request.url.path)}}}')
         try:
-            error_details = traceback.format_exc()
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"request","hypothesisId":"REQUEST","location":"main.py:middleware","message":"Request error","data":{"method":request.method,"path":request.url.path,"error_type":type(e).__name__,"error_msg":str(e)[:200]},"timestamp":int(time.time()*1000)})+"\n")
-        except: pass
-        # #endregion
-        raise
+            response = await call_next(request)
+            _log_request("Request completed", f'{{"method":{_json_str(request.method)},"path":{_json_str(request.url.path)},"status_code":{response.status_code}}}')
+            return response
+        except Exception as e:
+            _log_request("Request error", f'{{"method":{_json_str(request.method)},"path":{_json_str(request.url.path)},"error_type":{_json_str(type(e).__name__)},"error_msg":{_dumps(str(e)[:200])}}}')
+            raise
+# #endregion
 
 # CORS Middleware
 app.add_middleware(
@@ -108,26 +147,20 @@ app.add_middleware(
 
 # API Router einbinden
 # #region agent log
-try:
-    with open(log_path, 'a', encoding='utf-8') as f:
-        f.write(json.dumps({"sessionId":"debug-session","runId":"startup","hypothesisId":"STARTUP","location":"main.py:31","message":"Including API router","data":{},"timestamp":int(__import__('time').time()*1000)})+"\n")
-except: pass
+if _DEBUG_LOG:
+    write_log("Including API router", "main.py:31", "STARTUP")
 # #endregion
 try:
     app.include_router(api_router, prefix="/api/v1")
     # #region agent log
-    try:
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"sessionId":"debug-session","runId":"startup","hypothesisId":"STARTUP","location":"main.py:34","message":"API router included successfully","data":{},"timestamp":int(__import__('time').time()*1000)})+"\n")
-    except: pass
+    if _DEBUG_LOG:
+        write_log("API router included successfully", "main.py:34", "STARTUP")
     # #endregion
 except Exception as e:
     # #region agent log
-    try:
+    if _DEBUG_LOG:
         error_details = traceback.format_exc()
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"sessionId":"debug-session","runId":"startup","hypothesisId":"STARTUP","location":"main.py:38","message":"Error including API router","data":{"error_type":type(e).__name__,"error_msg":str(e)[:200],"traceback":error_details[:500]},"timestamp":int(__import__('time').time()*1000)})+"\n")
-    except: pass
+        write_log("Error including API router", "main.py:38", "STARTUP", {"error_type":type(e).__name__,"error_msg":str(e)[:200],"traceback":error_details[:500]})
     # #endregion
     raise
 
@@ -140,7 +173,9 @@ async def startup():
         import app.models  # Registriert alle Models bei Base
         Base.metadata.create_all(bind=engine)
     except Exception as e:
-        write_log("DB-Tabellenerstellung fehlgeschlagen", "main.py:startup", "B", {"error": str(e)[:200]})
+        print(f"DB-Tabellenerstellung fehlgeschlagen: {e}")
+        if _DEBUG_LOG:
+            write_log("DB-Tabellenerstellung fehlgeschlagen", "main.py:startup", "B", {"error": str(e)[:200]})
 
 
 @app.get("/health")
@@ -163,12 +198,9 @@ if os.path.isdir(_static_dir):
 
 if __name__ == "__main__":
     import uvicorn
-    import socket
     # #region agent log
-    try:
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"sessionId":"debug-session","runId":"startup","hypothesisId":"E","location":"main.py:uvicorn_start","message":"Checking port 8000 availability","data":{},"timestamp":int(time.time()*1000)})+"\n")
-    except: pass
+    if _DEBUG_LOG:
+        write_log("Checking port 8000 availability", "main.py:uvicorn_start", "E")
     # #endregion
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -177,30 +209,22 @@ if __name__ == "__main__":
         sock.close()
         if result == 0:
             # #region agent log
-            try:
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"startup","hypothesisId":"E","location":"main.py:uvicorn_start","message":"Port 8000 is already in use","data":{},"timestamp":int(time.time()*1000)})+"\n")
-            except: pass
+            if _DEBUG_LOG:
+                write_log("Port 8000 is already in use", "main.py:uvicorn_start", "E")
             # #endregion
         else:
             # #region agent log
-            try:
-                with open(log_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"startup","hypothesisId":"E","location":"main.py:uvicorn_start","message":"Port 8000 is available","data":{},"timestamp":int(time.time()*1000)})+"\n")
-            except: pass
+            if _DEBUG_LOG:
+                write_log("Port 8000 is available", "main.py:uvicorn_start", "E")
             # #endregion
     except Exception as e:
         # #region agent log
-        try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"startup","hypothesisId":"E","location":"main.py:uvicorn_start","message":"Port check failed","data":{"error":str(e)[:200]},"timestamp":int(time.time()*1000)})+"\n")
-        except: pass
+        if _DEBUG_LOG:
+            write_log("Port check failed", "main.py:uvicorn_start", "E", {"error":str(e)[:200]})
         # #endregion
     # #region agent log
-    try:
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"sessionId":"debug-session","runId":"startup","hypothesisId":"ALL","location":"main.py:uvicorn_start","message":"Starting uvicorn server","data":{"host":"0.0.0.0","port":8000},"timestamp":int(time.time()*1000)})+"\n")
-    except: pass
+    if _DEBUG_LOG:
+        write_log("Starting uvicorn server", "main.py:uvicorn_start", "ALL", {"host":"0.0.0.0","port":8000})
     # #endregion
     uvicorn.run(
         "main:app",
@@ -4,14 +4,271 @@ Testet den Download-Endpunkt und identifiziert mögliche Probleme
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import re
+import threading
 import time
 import sys
 import os
 from pathlib import Path
 
+# Optional: httpx für den asynchronen Modus (--async)
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# Optional: orjson für schnelleres JSON-Parsen der Dateilisten
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    import json
+    _loads = json.loads
+
 # API Base URL
 API_BASE_URL = "http://localhost:8000/api/v1"
 
+# Lesegröße pro Chunk beim Download (weniger Python-Durchläufe pro MB als 8 KB)
+DOWNLOAD_CHUNK_SIZE = 128 * 1024
+
+# Für die Formatprüfung genügt der Dateianfang
+HEADER_SIZE = 100
+
+# Uhrzeit für die Progress-Anzeige nur alle N Chunks prüfen (≈8 MB bei 128 KB)
+PROGRESS_CHECK_CHUNKS = 64
+
+# Progress-Zeile (mit \r in derselben Zeile überschrieben); Tausendertrennung nur in der Zusammenfassung
+_PROGRESS_FMT = "\r  {pct:5.1f}% {mb:8.2f} MB  {speed:6.2f} MB/s  ETA {eta:5.1f}s"
+_PROGRESS_FMT_UNKNOWN = "\r  {mb:8.2f} MB  {speed:6.2f} MB/s"
+
+# Paralleler Download über Range-Requests (nur wenn der Server Accept-Ranges: bytes meldet)
+RANGE_SEGMENTS = 4
+RANGE_MIN_SIZE = 8 * 1024 * 1024  # Kleinere Dateien lohnen die zusätzlichen Verbindungen nicht
+
+# Gleichzeitige Verbindungen im asynchronen Modus
+ASYNC_MAX_CONNECTIONS = 8
+
+# Chunks pro os.writev-Aufruf beim Speichern im asynchronen Modus (8 x 128 KB)
+WRITEV_BATCH = 8
+
+# Gemeinsame Session für alle Aufrufe: Verbindungen bleiben offen und werden wiederverwendet
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+SESSION.headers['Connection'] = 'keep-alive'
+
+
+def _write_all(fd: int, data: memoryview, offset: int = None):
+    """
+    Schreibt data vollständig in fd (os.write darf weniger Bytes schreiben als übergeben)
+    Mit offset wird per os.pwrite an diese Position geschrieben.
+    """
+    while data:
+        if offset is None:
+            written = os.write(fd, data)
+        else:
+            written = os.pwrite(fd, data, offset)
+            offset += written
+        data = data[written:]
+
+
+def _writev_all(fd: int, chunks: list):
+    """
+    Schreibt mehrere Puffer mit einem Systemaufruf (os.writev) vollständig in fd
+    Ohne os.writev (z.B. Windows) werden sie einzeln geschrieben.
+    """
+    if not hasattr(os, 'writev'):
+        for chunk in chunks:
+            _write_all(fd, memoryview(chunk))
+        return
+    views = [memoryview(chunk) for chunk in chunks]
+    while views:
+        written = os.writev(fd, views)
+        # Vollständig geschriebene Puffer entfernen, einen angefangenen kürzen
+        while views and written >= views[0].nbytes:
+            written -= views[0].nbytes
+            views.pop(0)
+        if written:
+            views[0] = views[0][written:]
+
+
+class _ProgressReader:
+    """
+    Liest aus dem urllib3-Stream einer Response und zählt dabei Bytes/Chunks mit
+    Aktualisiert höchstens alle 0.5 Sekunden eine Progress-Zeile und merkt sich den Dateianfang
+    (header_bytes) für die Formatprüfung.
+    """
+    
+    def __init__(self, raw, total_size, start_time):
+        self._raw = raw
+        self.total_size = total_size
+        self.start_time = start_time
+        self.bytes_read = 0
+        self.chunks = 0
+        self.header_bytes = b''
+        self._last_progress_time = start_time
+        self._chunks_since_check = 0
+        self.progress_shown = False
+    
+    def readinto(self, buffer):
+        n = self._raw.readinto(buffer)
+        if n:
+            if len(self.header_bytes) < HEADER_SIZE:
+                self.header_bytes += bytes(buffer[:min(n, HEADER_SIZE - len(self.header_bytes))])
+            self.count(n)
+        return n
+    
+    def count(self, n):
+        self.bytes_read += n
+        self.chunks += 1
+        self._chunks_since_check += 1
+        if self._chunks_since_check < PROGRESS_CHECK_CHUNKS:
+            return
+        self._chunks_since_check = 0
+        
+        # Progress-Anzeige höchstens alle 0.5 Sekunden
+        current_time = time.monotonic()
+        if current_time - self._last_progress_time >= 0.5:
+            downloaded_bytes = self.bytes_read
+            total_size = self.total_size
+            elapsed = current_time - self.start_time
+            speed = downloaded_bytes / elapsed if elapsed > 0 else 0
+            
+            if total_size:
+                eta = (total_size - downloaded_bytes) / speed if speed > 0 else 0
+                line = _PROGRESS_FMT.format(pct=downloaded_bytes / total_size * 100, mb=downloaded_bytes / 1048576,
+                                            speed=speed / 1048576, eta=eta)
+            else:
+                line = _PROGRESS_FMT_UNKNOWN.format(mb=downloaded_bytes / 1048576, speed=speed / 1048576)
+            # Ein write pro Aktualisierung; flush, damit die Zeile auch ohne Zeilenumbruch erscheint
+            sys.stdout.write(line)
+            sys.stdout.flush()
+            self.progress_shown = True
+            
+            self._last_progress_time = current_time
+
+
+def _ifc_header_status(header_bytes: bytes) -> str:
+    """Beschreibt den Dateianfang: erkannter IFC-Header oder Hinweis auf ein anderes Format"""
+    # Prüfe auf IFC-Marker (IFC-Dateien beginnen oft mit bestimmten Zeichen)
+    if header_bytes.startswith(b'ISO-10303-21'):
+        return "[OK] IFC-Datei erkannt (ISO-10303-21 Header)"
+    if header_bytes.startswith(b'IFC'):
+        return "[OK] IFC-Datei erkannt (IFC Header)"
+    # Prüfe auf Text-Encoding
+    try:
+        text_start = header_bytes.decode('utf-8', errors='ignore')
+        if 'ISO-10303-21' in text_start or 'IFC' in text_start:
+            return "[OK] IFC-Datei erkannt (Text-Header)"
+        return f"⚠️  Unbekanntes Dateiformat (beginnt mit: {text_start[:50]}...)"
+    except:
+        return "⚠️  Datei scheint binär zu sein"
+
+
+class _RangeNotSupported(Exception):
+    """Server beantwortet einen Range-Request nicht mit dem angeforderten Bereich (206)"""
+
+
+def _reserve_space(fd: int, size: int):
+    """Reserviert Speicherplatz vorab am Stück (nicht auf allen Plattformen/Dateisystemen möglich)"""
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError):
+        pass
+
+
+def _probe_range_download(url: str, need_pwrite: bool):
+    """
+    Prüft mit einem GET auf das erste Byte (Range: bytes=0-0), ob der Server Range-Requests
+    tatsächlich beantwortet; Accept-Ranges allein reicht nicht (ein StreamingResponse ignoriert Range)
+    
+    Returns:
+        Dateigröße laut Content-Range bei 206 und ausreichender Größe, sonst None
+    """
+    if need_pwrite and not hasattr(os, 'pwrite'):
+        return None
+    try:
+        with SESSION.get(
+            url,
+            stream=True,
+            headers={'Range': 'bytes=0-0', 'Accept-Encoding': 'identity'},
+            timeout=10
+        ) as probe:
+            if probe.status_code != 206 or probe.headers.get('Content-Encoding'):
+                return None
+            match = re.fullmatch(r'bytes 0-0/(\d+)', probe.headers.get('Content-Range', '').strip())
+            probe.content  # Ein Byte lesen, damit die Verbindung wiederverwendet wird
+    except requests.exceptions.RequestException:
+        return None
+    if not match:
+        return None
+    total_size = int(match.group(1))
+    return total_size if total_size >= RANGE_MIN_SIZE else None
+
+
+def _download_ranges(url: str, total_size: int, reader: _ProgressReader, fd: int = None):
+    """
+    Lädt die Datei in RANGE_SEGMENTS parallelen Range-Requests
+    
+    Jedes Segment liest in einen eigenen, wiederverwendeten Chunk-Puffer; mit fd wird per
+    os.pwrite an die jeweilige Position der Datei geschrieben, ohne fd nur gezählt.
+    Fortschritt und Dateianfang werden über reader erfasst.
+    
+    Raises:
+        _RangeNotSupported: Ein Segment wurde nicht als 206 mit passendem Bereich beantwortet
+    """
+    lock = threading.Lock()
+    stop = threading.Event()  # Nach dem ersten Fehler brechen die übrigen Segmente ab
+    segment_size = -(-total_size // RANGE_SEGMENTS)
+    
+    def fetch(lo: int, hi: int):
+        if stop.is_set():
+            return
+        response = SESSION.get(
+            url,
+            stream=True,
+            headers={'Range': f'bytes={lo}-{hi}', 'Accept-Encoding': 'identity'},
+            timeout=600
+        )
+        with response:
+            if (response.status_code != 206
+                    or not response.headers.get('Content-Range', '').startswith(f'bytes {lo}-{hi}/')):
+                raise _RangeNotSupported(f"Range-Request {lo}-{hi} lieferte Status {response.status_code}")
+            raw = response.raw
+            chunk = memoryview(bytearray(DOWNLOAD_CHUNK_SIZE))
+            pos = lo
+            while pos <= hi:
+                if stop.is_set():
+                    return
+                view = chunk[:min(DOWNLOAD_CHUNK_SIZE, hi + 1 - pos)]
+                n = raw.readinto(view)
+                if not n:
+                    raise RuntimeError(f"Segment {lo}-{hi} nach {pos - lo:,} bytes abgebrochen")
+                if fd is not None:
+                    _write_all(fd, view[:n], pos)
+                with lock:
+                    if pos < HEADER_SIZE:
+                        reader.header_bytes += bytes(view[:min(n, HEADER_SIZE - pos)])
+                    reader.count(n)
+                pos += n
+    
+    with ThreadPoolExecutor(max_workers=RANGE_SEGMENTS) as executor:
+        futures = [
+            executor.submit(fetch, lo, min(lo + segment_size, total_size) - 1)
+            for lo in range(0, total_size, segment_size)
+        ]
+        try:
+            for future in futures:
+                future.result()
+        except BaseException:
+            stop.set()
+            raise
+
+
 def test_file_download(file_id: int, output_path: str = None):
     """
     Testet den Download einer Datei
@@ -29,71 +286,116 @@ def test_file_download(file_id: int, output_path: str = None):
     print(f"URL: {url}")
     print(f"Starte Download...\n")
     
-    start_time = time.time()
-    downloaded_bytes = 0
-    chunks_received = 0
+    # Monotone Uhr für Zeitmessungen (time.time() kann springen); lokal gebunden für die Schleifen
+    _now = time.monotonic
+    start_time = _now()
     
     try:
-        # Request mit Streaming
-        response = requests.get(
-            url,
-            stream=True,
-            timeout=600  # 10 Minuten Timeout
-        )
-        
-        # Prüfe Status-Code
-        print(f"Status Code: {response.status_code}")
-        print(f"Headers:")
-        for key, value in response.headers.items():
-            print(f"  {key}: {value}")
-        print()
-        
-        if response.status_code != 200:
-            print(f"[ERROR] FEHLER: Status Code {response.status_code}")
-            print(f"Response Text: {response.text[:500]}")
-            return False
+        if output_path:
+            os.makedirs(os.path.dirname(output_path) if os.path.dirname(output_path) else '.', exist_ok=True)
         
-        # Lade Datei in Chunks
-        content_length = response.headers.get('Content-Length')
-        if content_length:
-            total_size = int(content_length)
+        # Beantwortet der Server Range-Requests, wird die Datei in parallelen Segmenten geladen
+        reader = None
+        total_size = _probe_range_download(url, need_pwrite=bool(output_path))
+        if total_size:
+            print(f"Range-Requests werden unterstützt")
             print(f"Erwartete Größe: {total_size:,} bytes ({total_size / 1024 / 1024:.2f} MB)")
-        else:
-            total_size = None
-            print(f"Erwartete Größe: Unbekannt (kein Content-Length Header)")
-        
-        print(f"\nLade Datei...")
-        
-        chunks = []
-        last_progress_time = time.time()
+            print(f"\nLade Datei...")
+            print(f"Paralleler Download in {RANGE_SEGMENTS} Segmenten (Range-Requests)")
+            reader = _ProgressReader(None, total_size, start_time)
+            try:
+                if output_path:
+                    print(f"Speichere Datei nach: {output_path}")
+                    try:
+                        with open(output_path, 'wb', buffering=0) as f:
+                            _reserve_space(f.fileno(), total_size)
+                            _download_ranges(url, total_size, reader, f.fileno())
+                    except BaseException:
+                        # Fehlendes Segment: die vorab reservierte Datei hätte Lücken -> entfernen
+                        os.remove(output_path)
+                        raise
+                    print(f"[OK] Datei gespeichert")
+                else:
+                    _download_ranges(url, total_size, reader)
+            except _RangeNotSupported as e:
+                if reader.progress_shown:
+                    sys.stdout.write("\n")
+                print(f"⚠️  {e} - lade die Datei stattdessen in einem Stück\n")
+                reader = None
         
-        for chunk in response.iter_content(chunk_size=8192):
-            if chunk:
-                chunks.append(chunk)
-                downloaded_bytes += len(chunk)
-                chunks_received += 1
-                
-                # Progress-Anzeige alle 0.5 Sekunden
-                current_time = time.time()
-                if current_time - last_progress_time >= 0.5:
-                    elapsed = current_time - start_time
-                    speed = downloaded_bytes / elapsed if elapsed > 0 else 0
-                    
+        if reader is None:
+            # Request mit Streaming
+            response = SESSION.get(
+                url,
+                stream=True,
+                # IFC-Dateien nicht komprimiert übertragen lassen (spart CPU auf beiden Seiten)
+                headers={'Accept-Encoding': 'identity'},
+                timeout=600  # 10 Minuten Timeout
+            )
+            
+            # Prüfe Status-Code
+            print(f"Status Code: {response.status_code}")
+            print(f"Headers:")
+            for key, value in response.headers.items():
+                print(f"  {key}: {value}")
+            print()
+            
+            if response.status_code != 200:
+                print(f"[ERROR] FEHLER: Status Code {response.status_code}")
+                print(f"Response Text: {response.text[:500]}")
+                return False
+            
+            # Lade Datei in Chunks
+            content_length = response.headers.get('Content-Length')
+            if content_length:
+                total_size = int(content_length)
+                print(f"Erwartete Größe: {total_size:,} bytes ({total_size / 1024 / 1024:.2f} MB)")
+            else:
+                total_size = None
+                print(f"Erwartete Größe: Unbekannt (kein Content-Length Header)")
+            
+            print(f"\nLade Datei...")
+            
+            # Direkt vom urllib3-Stream lesen statt über iter_content (eine Generator-Ebene weniger)
+            response.raw.decode_content = True
+            reader = _ProgressReader(response.raw, total_size, start_time)
+            readinto = reader.readinto
+            
+            if output_path:
+                # Direkt auf Platte streamen statt die Datei im Speicher zu sammeln
+                print(f"Speichere Datei nach: {output_path}")
+                # Ein wiederverwendeter Puffer für alle Chunks statt eines neuen bytes-Objekts pro Chunk;
+                # geschrieben wird ungepuffert direkt auf den Dateideskriptor
+                with open(output_path, 'wb', buffering=0) as f:
+                    fd = f.fileno()
                     if total_size:
-                        percent = (downloaded_bytes / total_size) * 100
-                        remaining = total_size - downloaded_bytes
-                        eta = remaining / speed if speed > 0 else 0
-                        print(f"  Progress: {percent:.1f}% ({downloaded_bytes:,}/{total_size:,} bytes) "
-                              f"Speed: {speed / 1024 / 1024:.2f} MB/s ETA: {eta:.1f}s")
-                    else:
-                        print(f"  Progress: {downloaded_bytes:,} bytes "
-                              f"Speed: {speed / 1024 / 1024:.2f} MB/s")
-                    
-                    last_progress_time = current_time
+                        _reserve_space(fd, total_size)
+                    try:
+                        with memoryview(bytearray(DOWNLOAD_CHUNK_SIZE)) as mv:
+                            while True:
+                                n = readinto(mv)
+                                if not n:
+                                    break
+                                _write_all(fd, mv[:n])
+                    finally:
+                        if total_size and reader.bytes_read < total_size:
+                            # Vorzeitig beendet: vorab reservierten Rest wieder abschneiden
+                            os.ftruncate(fd, reader.bytes_read)
+                print(f"[OK] Datei gespeichert")
+            else:
+                # Ohne output_path wird der Inhalt nur geprüft (Größe, Dateianfang): in einen
+                # wiederverwendeten Chunk-Puffer lesen statt die ganze Datei im Speicher zu halten
+                with memoryview(bytearray(DOWNLOAD_CHUNK_SIZE)) as mv:
+                    while readinto(mv):
+                        pass
         
-        # Zusammenfügen aller Chunks
-        file_content = b''.join(chunks)
-        duration = time.time() - start_time
+        downloaded_bytes = reader.bytes_read
+        chunks_received = reader.chunks
+        header_bytes = reader.header_bytes
+        duration = _now() - start_time
+        if reader.progress_shown:
+            # Progress-Zeile abschließen
+            sys.stdout.write("\n")
         
         print(f"\n[OK] Download abgeschlossen!")
         print(f"  Dauer: {duration:.2f} Sekunden")
@@ -110,38 +412,16 @@ def test_file_download(file_id: int, output_path: str = None):
         # Validiere Datei-Inhalt
         print(f"\nValidiere Datei-Inhalt...")
         
-        if len(file_content) == 0:
+        if downloaded_bytes == 0:
             print(f"[ERROR] FEHLER: Datei ist leer!")
             return False
         
-        # Prüfe auf IFC-Marker (IFC-Dateien beginnen oft mit bestimmten Zeichen)
-        if file_content.startswith(b'ISO-10303-21'):
-            print(f"[OK] IFC-Datei erkannt (ISO-10303-21 Header)")
-        elif file_content.startswith(b'IFC'):
-            print(f"[OK] IFC-Datei erkannt (IFC Header)")
-        else:
-            # Prüfe auf Text-Encoding
-            try:
-                text_start = file_content[:100].decode('utf-8', errors='ignore')
-                if 'ISO-10303-21' in text_start or 'IFC' in text_start:
-                    print(f"[OK] IFC-Datei erkannt (Text-Header)")
-                else:
-                    print(f"⚠️  Unbekanntes Dateiformat (beginnt mit: {text_start[:50]}...)")
-            except:
-                print(f"⚠️  Datei scheint binär zu sein")
-        
-        # Speichere Datei falls gewünscht
-        if output_path:
-            print(f"\nSpeichere Datei nach: {output_path}")
-            os.makedirs(os.path.dirname(output_path) if os.path.dirname(output_path) else '.', exist_ok=True)
-            with open(output_path, 'wb') as f:
-                f.write(file_content)
-            print(f"[OK] Datei gespeichert")
+        print(_ifc_header_status(header_bytes))
         
         return True
         
     except requests.exceptions.Timeout:
-        print(f"[ERROR] FEHLER: Timeout nach {time.time() - start_time:.2f} Sekunden")
+        print(f"[ERROR] FEHLER: Timeout nach {_now() - start_time:.2f} Sekunden")
         return False
     except requests.exceptions.ConnectionError as e:
         print(f"[ERROR] FEHLER: Verbindungsfehler")
@@ -158,6 +438,87 @@ def test_file_download(file_id: int, output_path: str = None):
         return False
 
 
+async def _async_download(client: "httpx.AsyncClient", file_id: int, output_dir: str = None):
+    """
+    Lädt eine Datei über den asynchronen Client
+    
+    Args:
+        client: Gemeinsamer httpx.AsyncClient
+        file_id: ID der Datei zum Download
+        output_dir: Optionales Verzeichnis zum Speichern (als <file_id>.ifc)
+    
+    Returns:
+        (Erfolg, Ergebniszeile)
+    """
+    url = f"{API_BASE_URL}/files/{file_id}/download"
+    start_time = time.monotonic()
+    downloaded_bytes = 0
+    header_bytes = b''
+    out_file = None
+    
+    try:
+        async with client.stream("GET", url, headers={'Accept-Encoding': 'identity'}) as response:
+            if response.status_code != 200:
+                return False, f"[ERROR] Datei {file_id}: Status Code {response.status_code}"
+            
+            content_length = response.headers.get('Content-Length')
+            total_size = int(content_length) if content_length else None
+            if output_dir:
+                out_file = open(os.path.join(output_dir, f"{file_id}.ifc"), 'wb', buffering=0)
+            
+            # Chunks sammeln und gebündelt mit einem os.writev schreiben statt einzeln;
+            # geschrieben wird in einem Worker-Thread, damit die anderen Downloads weiterlaufen
+            pending = []
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                if len(header_bytes) < HEADER_SIZE:
+                    header_bytes += chunk[:HEADER_SIZE - len(header_bytes)]
+                if out_file is not None:
+                    pending.append(chunk)
+                    if len(pending) >= WRITEV_BATCH:
+                        await asyncio.to_thread(_writev_all, out_file.fileno(), pending)
+                        pending = []
+                downloaded_bytes += len(chunk)
+            if pending:
+                await asyncio.to_thread(_writev_all, out_file.fileno(), pending)
+    except (httpx.HTTPError, OSError) as e:
+        return False, f"[ERROR] Datei {file_id}: {type(e).__name__}: {str(e)}"
+    finally:
+        if out_file is not None:
+            out_file.close()
+    
+    duration = time.monotonic() - start_time
+    if downloaded_bytes == 0:
+        return False, f"[ERROR] Datei {file_id}: Datei ist leer!"
+    
+    line = (f"Datei {file_id}: {downloaded_bytes:,} bytes in {duration:.2f}s "
+            f"({downloaded_bytes / duration / 1024 / 1024:.2f} MB/s) | {_ifc_header_status(header_bytes)}")
+    if total_size and downloaded_bytes != total_size:
+        line += f"\n  ⚠️  WARNUNG: Größe stimmt nicht überein (erwartet {total_size:,} bytes)"
+    return True, line
+
+
+async def _async_main(file_ids: list, output_dir: str = None) -> bool:
+    """Lädt mehrere Dateien gleichzeitig über einen gemeinsamen Verbindungspool"""
+    print(f"\nAsynchroner Download von {len(file_ids)} Datei(en)...")
+    if output_dir:
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+        except OSError as e:
+            print(f"[ERROR] Ausgabeverzeichnis nicht verwendbar: {type(e).__name__}: {str(e)}")
+            return False
+    
+    # Das Backend (uvicorn) spricht nur HTTP/1.1; parallele Downloads laufen über mehrere Verbindungen
+    limits = httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS, max_keepalive_connections=ASYNC_MAX_CONNECTIONS)
+    start_time = time.monotonic()
+    async with httpx.AsyncClient(timeout=600, limits=limits) as client:
+        results = await asyncio.gather(*(_async_download(client, file_id, output_dir) for file_id in file_ids))
+    
+    for _, line in results:
+        print(f"  {line}")
+    print(f"\nGesamtdauer: {time.monotonic() - start_time:.2f} Sekunden")
+    return all(ok for ok, _ in results)
+
+
 def list_files(project_id: int = None):
     """Listet alle Dateien auf (optional gefiltert nach Projekt)"""
     if project_id:
@@ -168,13 +529,18 @@ def list_files(project_id: int = None):
         return []
     
     try:
-        response = requests.get(url, timeout=10)
+        response = SESSION.get(url, timeout=10)
         if response.status_code == 200:
-            files = response.json()
+            # Direkt aus den Bytes parsen (ohne Zeichensatz-Erkennung von requests)
+            files = _loads(response.content)
             print(f"\nGefundene Dateien:")
-            for file in files:
-                print(f"  ID: {file['id']:4d} | {file['original_filename']:40s} | "
-                      f"Typ: {file['file_type']:10s} | Größe: {file.get('file_size', 'N/A')}")
+            # Bei großen Projekten eine Ausgabe statt eines print pro Datei
+            if files:
+                print("\n".join(
+                    f"  ID: {file['id']:4d} | {file['original_filename']:40s} | "
+                    f"Typ: {file['file_type']:10s} | Größe: {file.get('file_size', 'N/A')}"
+                    for file in files
+                ))
             return files
         else:
             print(f"❌ Fehler beim Abrufen der Dateien: {response.status_code}")
@@ -192,21 +558,45 @@ if __name__ == "__main__":
         print("\nVerwendung:")
         print(f"  python {sys.argv[0]} <file_id> [output_path]")
         print(f"  python {sys.argv[0]} --list <project_id>")
+        print(f"  python {sys.argv[0]} --async <file_id> [<file_id> ...] [--out <verzeichnis>]")
         print("\nBeispiele:")
         print(f"  python {sys.argv[0]} 1")
         print(f"  python {sys.argv[0]} 1 output.ifc")
         print(f"  python {sys.argv[0]} --list 1")
+        print(f"  python {sys.argv[0]} --async 1 2 3 --out downloads")
         sys.exit(1)
     
-    if sys.argv[1] == "--list":
-        if len(sys.argv) < 3:
-            print("Bitte gib eine Projekt-ID an")
+    if sys.argv[1] == "--async":
+        if not HTTPX_AVAILABLE:
+            print("[ERROR] Für --async wird httpx benötigt (pip install httpx)")
+            sys.exit(1)
+        args = sys.argv[2:]
+        output_dir = None
+        if "--out" in args:
+            index = args.index("--out")
+            if index + 1 >= len(args):
+                print("Bitte gib ein Ausgabeverzeichnis an")
+                sys.exit(1)
+            output_dir = args[index + 1]
+            del args[index:index + 2]
+        if not args:
+            print("Bitte gib mindestens eine Datei-ID an")
             sys.exit(1)
-        project_id = int(sys.argv[2])
-        list_files(project_id)
-    else:
-        file_id = int(sys.argv[1])
-        output_path = sys.argv[2] if len(sys.argv) > 2 else None
         
-        success = test_file_download(file_id, output_path)
+        success = asyncio.run(_async_main([int(arg) for arg in args], output_dir))
         sys.exit(0 if success else 1)
+    
+    # Session (und ihre offenen Verbindungen) beim Beenden schließen
+    with SESSION:
+        if sys.argv[1] == "--list":
+            if len(sys.argv) < 3:
+                print("Bitte gib eine Projekt-ID an")
+                sys.exit(1)
+            project_id = int(sys.argv[2])
+            list_files(project_id)
+        else:
+            file_id = int(sys.argv[1])
+            output_path = sys.argv[2] if len(sys.argv) > 2 else None
+            
+            success = test_file_download(file_id, output_path)
+            sys.exit(0 if success else 1)
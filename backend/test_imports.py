@@ -1,86 +1,94 @@
 """
 Test script to check which imports are failing
+
+By default each module is only located via importlib.util.find_spec. The module itself is not
+executed, but its parent packages are imported (e.g. fastapi for fastapi.middleware.cors). Missing
+dependencies of a module (pandas, camelot, cv2, sqlalchemy, ...) are therefore not detected.
+Pass --deep to actually import the modules and the names used by the app.
+The find_spec probes run concurrently, --deep imports run one after another (concurrent imports
+of the same package graph can fail depending on timing); results are printed in step order.
 """
+import importlib
+import importlib.util
+import os
 import sys
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+DEEP = "--deep" in sys.argv[1:]
+
+# (step description, [(module, names imported from it)], hint on failure)
+STEPS = [
+    ("basic imports", [("json", ()), ("os", ()), ("traceback", ()), ("time", ())], None),
+    ("FastAPI imports", [
+        ("fastapi", ("FastAPI", "Request")),
+        ("fastapi.middleware.cors", ("CORSMiddleware",)),
+        ("fastapi.responses", ("JSONResponse",)),
+    ], None),
+    ("config import", [("app.core.config", ("settings",))], None),
+    ("database imports", [("app.core.database", ("get_db", "engine"))], None),
+    ("parser imports", [
+        ("app.parsers.excel_parser", ("ExcelParser",)),
+        ("app.parsers.word_parser", ("WordParser",)),
+        ("app.parsers.pdf_parser", ("PDFParser",)),
+    ], "Missing modules might be: camelot, pytesseract, cv2, ifcopenshell, numpy"),
+    ("extraction service import", [("app.services.extraction_service", ("ExtractionService",))], None),
+    ("API router import", [("app.api.v1", ("api_router",))], None),
+]
+
+
+def can_import(name: str) -> bool:
+    """True if the module can be found on sys.path (imports parent packages, not the module itself)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        # Parent package is missing
+        return False
 
-print("Testing imports...")
 
-try:
-    print("1. Testing basic imports...")
-    import json
-    import os
-    import traceback
-    import time
-    print("   ✓ Basic imports OK")
-except Exception as e:
-    print(f"   ✗ Basic imports failed: {e}")
-    sys.exit(1)
+def probe(module: str, names: tuple):
+    """Checks a module; raises on failure"""
+    if DEEP:
+        imported = importlib.import_module(module)
+        for name in names:
+            getattr(imported, name)
+    elif not can_import(module):
+        raise ModuleNotFoundError(f"No module named '{module}'", name=module)
 
-try:
-    print("2. Testing FastAPI imports...")
-    from fastapi import FastAPI, Request
-    from fastapi.middleware.cors import CORSMiddleware
-    from fastapi.responses import JSONResponse
-    print("   ✓ FastAPI imports OK")
-except Exception as e:
-    print(f"   ✗ FastAPI imports failed: {e}")
-    traceback.print_exc()
-    sys.exit(1)
 
-try:
-    print("3. Testing config import...")
-    from app.core.config import settings
-    print(f"   ✓ Config imported OK (DB: {settings.DATABASE_URL[:50]})")
-except Exception as e:
-    print(f"   ✗ Config import failed: {e}")
-    traceback.print_exc()
-    sys.exit(1)
+def run_step(modules: list):
+    """Probes all modules of a step; returns (exception, formatted traceback) or (None, None)"""
+    try:
+        for module, names in modules:
+            probe(module, names)
+    except Exception as e:
+        return e, traceback.format_exc()
+    return None, None
 
-try:
-    print("4. Testing database import...")
-    from app.core.database import get_db, engine
-    print("   ✓ Database imports OK")
-except Exception as e:
-    print(f"   ✗ Database imports failed: {e}")
-    traceback.print_exc()
-    sys.exit(1)
 
-try:
-    print("5. Testing parser imports...")
-    print("   5a. Testing excel_parser...")
-    from app.parsers.excel_parser import ExcelParser
-    print("      ✓ ExcelParser OK")
-    
-    print("   5b. Testing word_parser...")
-    from app.parsers.word_parser import WordParser
-    print("      ✓ WordParser OK")
-    
-    print("   5c. Testing pdf_parser...")
-    from app.parsers.pdf_parser import PDFParser
-    print("      ✓ PDFParser OK")
-except Exception as e:
-    print(f"   ✗ Parser imports failed: {e}")
-    traceback.print_exc()
-    print("\n   Missing modules might be: camelot, pytesseract, cv2, ifcopenshell, numpy")
-    sys.exit(1)
+print(f"Testing imports{' (--deep: importing modules)' if DEEP else ' (find_spec only, use --deep to import)'}...")
 
-try:
-    print("6. Testing extraction service import...")
-    from app.services.extraction_service import ExtractionService
-    print("   ✓ ExtractionService imported OK")
-except Exception as e:
-    print(f"   ✗ ExtractionService import failed: {e}")
-    traceback.print_exc()
-    sys.exit(1)
+step_modules = [modules for _, modules, _ in STEPS]
+if DEEP:
+    # Steps import overlapping parts of the app package; concurrently, an import cycle would show
+    # up as a timing-dependent "partially initialized module" error
+    results = [run_step(modules) for modules in step_modules]
+else:
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = list(executor.map(run_step, step_modules))
 
-try:
-    print("7. Testing API router import...")
-    from app.api.v1 import api_router
-    print("   ✓ API router imported OK")
-except Exception as e:
-    print(f"   ✗ API router import failed: {e}")
-    traceback.print_exc()
-    sys.exit(1)
+for number, ((description, _, hint), (error, error_traceback)) in enumerate(zip(STEPS, results), start=1):
+    print(f"{number}. Testing {description}...")
+    if error is None:
+        print(f"   ✓ {description[0].upper()}{description[1:]} {'OK' if DEEP else 'found'}")
+    else:
+        print(f"   ✗ {description[0].upper()}{description[1:]} failed: {error}")
+        sys.stderr.write(error_traceback)
+        if hint and DEEP:
+            print(f"\n   {hint}")
+        sys.exit(1)
 
-print("\nAll imports successful!")
+if DEEP:
+    print("\nAll imports successful!")
+else:
+    print("\nAll modules found (run with --deep to verify imports)")